@@ -0,0 +1,89 @@
+"""Helpers shared by the file-based migrators.
+
+Config loading, the transform memo, the directory walk and the in-place
+file rewrite used by the ZCML/GenericSetup and page template migrators
+(and the config loading also by the import migrator).
+"""
+
+from collections.abc import Callable
+from collections.abc import Iterator
+from functools import lru_cache
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import os
+import yaml
+
+
+CONFIG_PATH = Path(__file__).resolve().parent / "migration_config.yaml"
+
+# libyaml's loader parses the config about ten times faster than the
+# pure-Python one; fall back when PyYAML was built without it.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Directory names never descended into (besides hidden directories such
+# as .git, .tox or .venv).  They hold third-party or generated files, not
+# the package's own ZCML, profiles and templates.
+SKIP_DIRS = frozenset({"__pycache__", "node_modules"})
+
+
+@lru_cache(maxsize=32)
+def load_config(config_path: Path = CONFIG_PATH) -> dict[str, Any]:
+    """Parse *config_path*, once per process.
+
+    The result is shared between callers and must not be mutated.
+    """
+    with open(config_path) as fh:
+        return yaml.load(fh, Loader=_YAML_LOADER)
+
+
+def memoized(transformer: Callable[..., str], **kwargs: Any) -> Callable[[str], str]:
+    """Bind *kwargs* to *transformer* and cache its results by content.
+
+    Plone add-ons often carry many byte-identical files (``configure.zcml``
+    stubs in every sub-package, copied profile XML, template fragments),
+    so each distinct content is only transformed once per run.  The LRU
+    bound keeps memory in check on very large trees.
+    """
+    return lru_cache(maxsize=1024)(partial(transformer, **kwargs))
+
+
+def iter_files(root: Path, suffixes: str | tuple[str, ...]) -> Iterator[Path]:
+    """Yield all files below *root* whose name ends in one of *suffixes*.
+
+    A stack-based ``os.scandir`` walk: ``DirEntry.is_dir`` answers from
+    the readdir data, so no extra ``stat`` is made per entry, skipped
+    directories are pruned before they are read, and several suffixes
+    are collected in a single pass.  Like ``Path.rglob``, symlinked
+    directories are not followed.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        name = entry.name
+                        if not (name.startswith(".") or name in SKIP_DIRS):
+                            stack.append(entry.path)
+                    elif entry.name.endswith(suffixes):
+                        yield Path(entry.path)
+        except OSError:
+            continue
+
+
+def overwrite(filepath: Path, data: bytes) -> None:
+    """Replace the contents of the existing *filepath* with *data*.
+
+    A bare ``os.write`` loop skips the buffered file object that
+    ``Path.write_bytes`` sets up, which dominates for small files.
+    ``O_BINARY`` (Windows only) keeps ``\\r\\n`` line endings intact.
+    """
+    fd = os.open(filepath, os.O_WRONLY | os.O_TRUNC | getattr(os, "O_BINARY", 0))
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
@@ -18,12 +18,10 @@ from dataclasses import dataclass
 from libcst.codemod import CodemodContext
 from libcst.codemod import VisitorBasedCodemodCommand
 from pathlib import Path
+from plone_codemod._common import CONFIG_PATH
+from plone_codemod._common import load_config
 
 import libcst as cst
-import yaml
-
-
-CONFIG_PATH = Path(__file__).resolve().parent / "migration_config.yaml"
 
 
 @dataclass(frozen=True)
@@ -35,8 +33,7 @@ class ImportMapping:
 
 
 def load_mappings(config_path: Path = CONFIG_PATH) -> list[ImportMapping]:
-    with open(config_path) as fh:
-        config = yaml.safe_load(fh)
+    config = load_config(config_path)
 
     mappings = []
     for entry in config.get("imports", []):
@@ -15,9 +15,12 @@ Detects and removes namespace declarations from ``__init__.py`` files:
 Also cleans up ``namespace_packages`` from setup.py/setup.cfg.
 """
 
+from collections.abc import Iterator
 from pathlib import Path
 
-import ast
+import configparser
+import libcst as cst
+import os
 import re
 
 
@@ -42,26 +45,55 @@ _RE_PKGUTIL_PATH = re.compile(
 )
 
 
+# All of the above fused into one alternation, so a single ``match`` call
+# classifies a line instead of up to three failed attempts
+_NS_LINE_RE = re.compile(
+    "|".join(
+        f"(?:{p.pattern})"
+        for p in (_RE_PKG_RESOURCES, _RE_PKGUTIL_IMPORT, _RE_PKGUTIL_PATH)
+    ),
+)
+
+# The same alternation, anywhere in a file (for whole-content detection)
+_RE_NAMESPACE_ANY = re.compile(_NS_LINE_RE.pattern, re.MULTILINE)
+
+
+# Boilerplate allowed around a declaration: blank/comment lines and the
+# try/except/pass wrapper, folded into one pattern
+_BENIGN_LINE_RE = re.compile(
+    r"^\s*(?:#.*|try\s*:|except(?:\s+ImportError)?\s*:|pass)?\s*$",
+)
+
+
+def _has_namespace_marker(content: str) -> bool:
+    """Cheap substring pre-check: every declaration contains one of these.
+
+    The vast majority of ``__init__.py`` files are not namespace shims;
+    a plain ``in`` test rules them out without running any regex.  Two
+    ``in`` tests beat a single ``declare_namespace|extend_path`` regex
+    search: the substring search is vectorised, the regex alternation
+    has no literal prefix to skip ahead with.  ``_classify_init_file``
+    applies the same check to raw bytes.
+    """
+    return "declare_namespace" in content or "extend_path" in content
+
+
 def is_namespace_declaration(line: str) -> bool:
     """Return True if *line* is a namespace package declaration.
 
     Operates on individual lines (not multi-line content) because the
-    regexes use ``^`` anchors.  Blank lines and comments are excluded
-    so callers can iterate over a file and classify each line.
+    regexes use ``^`` anchors.  Blank lines and comments never match
+    (every alternative starts with a code token), so callers can iterate
+    over a file and classify each line.
     """
-    stripped = line.strip()
-    if not stripped or stripped.startswith("#"):
-        return False
-    return bool(
-        _RE_PKG_RESOURCES.match(line)
-        or _RE_PKGUTIL_IMPORT.match(line)
-        or _RE_PKGUTIL_PATH.match(line)
-    )
+    return _NS_LINE_RE.match(line) is not None
 
 
 def has_namespace_declaration(content: str) -> bool:
     """Return True if *content* contains any namespace declaration."""
-    return any(is_namespace_declaration(line) for line in content.splitlines())
+    if not _has_namespace_marker(content):
+        return False
+    return _RE_NAMESPACE_ANY.search(content) is not None
 
 
 def is_only_namespace_init(content: str) -> bool:
@@ -75,22 +107,22 @@ def is_only_namespace_init(content: str) -> bool:
     Allows comments, blank lines, try/except wrappers, and encoding cookies
     alongside the declaration — these are all part of the boilerplate.
     """
-    if not has_namespace_declaration(content):
+    if not _has_namespace_marker(content):
         return False
+    saw_declaration = False
+    # Bound methods hoisted out of the loop; the declaration check is
+    # is_namespace_declaration() without the per-line call overhead
+    benign = _BENIGN_LINE_RE.match
+    declaration = _NS_LINE_RE.match
     for line in content.splitlines():
-        stripped = line.strip()
-        if not stripped:
-            continue
-        if stripped.startswith("#"):
-            continue
-        if is_namespace_declaration(line):
+        if benign(line):
             continue
-        # try / except / pass are part of the common wrapper
-        if stripped in ("try:", "except ImportError:", "except:", "pass"):
+        if declaration(line):
+            saw_declaration = True
             continue
         # Any other real code → not namespace-only
         return False
-    return True
+    return saw_declaration
 
 
 # ---------------------------------------------------------------------------
@@ -112,61 +144,66 @@ def remove_namespace_declaration(content: str) -> str:
     - try/except ImportError wrappers around pkg_resources (very common in
       Plone ecosystem — the try/except was needed for editable installs)
     - pkgutil import + ``__path__`` assignment pairs (always appear together)
+
+    Content without any declaration is returned unchanged (the same object),
+    so callers can skip the write.
     """
+    if not _has_namespace_marker(content):
+        return content
     lines = content.splitlines(keepends=True)
+    n = len(lines)
     result: list[str] = []
     i = 0
-    while i < len(lines):
+    while i < n:
         line = lines[i]
-        stripped = line.strip()
 
         # Detect try/except wrapper for pkg_resources
-        if stripped == "try:":
+        if line.strip() == "try:":
             # Look ahead for the pkg_resources pattern inside try block
             block = _collect_try_except_block(lines, i)
             if block is not None and any(
                 _RE_PKG_RESOURCES.match(ln) for ln in lines[i : i + block]
             ):
-                i += block
-                # Skip trailing blank lines after the block
-                while i < len(lines) and not lines[i].strip():
-                    i += 1
+                # Skip the block plus trailing blank lines after it
+                i = _skip_blank_lines(lines, i + block)
                 continue
 
-        # Simple pkg_resources line
-        if _RE_PKG_RESOURCES.match(line):
+        # One fused match lets ordinary code lines through cheaply
+        if not _NS_LINE_RE.match(line):
+            result.append(line)
             i += 1
-            while i < len(lines) and not lines[i].strip():
-                i += 1
             continue
 
         # pkgutil import line
         if _RE_PKGUTIL_IMPORT.match(line):
-            i += 1
+            i = _skip_blank_lines(lines, i + 1)
             # Also consume the __path__ = extend_path(...) line that follows
-            while i < len(lines) and not lines[i].strip():
-                i += 1
-            if i < len(lines) and _RE_PKGUTIL_PATH.match(lines[i]):
-                i += 1
-                while i < len(lines) and not lines[i].strip():
-                    i += 1
+            if i < n and _RE_PKGUTIL_PATH.match(lines[i]):
+                i = _skip_blank_lines(lines, i + 1)
             continue
 
-        # Standalone __path__ = extend_path(...) (shouldn't happen alone, but be safe)
-        if _RE_PKGUTIL_PATH.match(line):
-            i += 1
-            while i < len(lines) and not lines[i].strip():
-                i += 1
-            continue
+        # Simple pkg_resources line, or a standalone
+        # __path__ = extend_path(...) (shouldn't happen alone, but be safe)
+        i = _skip_blank_lines(lines, i + 1)
 
-        result.append(line)
-        i += 1
+    # Marker only in a comment or string: nothing was removed, so don't
+    # normalise surrounding blank lines (that would force a rewrite)
+    if len(result) == len(lines):
+        return content
 
     # Strip leading blank lines from result
     text = "".join(result)
     return text.strip("\n") + "\n" if text.strip() else ""
 
 
+def _skip_blank_lines(lines: list[str], i: int) -> int:
+    """Return the index of the first non-blank line at or after *i*."""
+    n = len(lines)
+    while i < n and not lines[i].strip():
+        i += 1
+    return i
+
+
 def _collect_try_except_block(lines: list[str], start: int) -> int | None:
     """Return the number of lines in a try/except block starting at *start*.
 
@@ -214,6 +251,56 @@ def _is_indented(line: str) -> bool:
 # ---------------------------------------------------------------------------
 
 
+# Directory names never descended into (besides hidden and .egg-info dirs)
+_SKIP_DIRS = frozenset({"build", "dist", "__pycache__", "node_modules"})
+
+
+def _iter_init_files(root: Path) -> Iterator[str]:
+    """Yield the paths of all ``__init__.py`` files below *root*.
+
+    A stack-based ``os.scandir`` walk rather than ``Path.rglob``: skipped
+    directories are pruned before they are descended into, no ``Path``
+    object is built per directory entry, and ``DirEntry.is_dir`` answers
+    from the readdir data without an extra ``stat`` call.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if not (
+                            name.startswith(".")
+                            or name in _SKIP_DIRS
+                            or name.endswith(".egg-info")
+                        ):
+                            stack.append(entry.path)
+                    elif name == "__init__.py":
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def _classify_init_file(init_file: str) -> tuple[Path, bool] | None:
+    """Return ``(path, delete_entirely)`` for a namespace init, else None."""
+    try:
+        with open(init_file, "rb") as fh:
+            data = fh.read()
+    except OSError:
+        return None
+    # Only the few files that can hold a declaration are decoded
+    if b"declare_namespace" not in data and b"extend_path" not in data:
+        return None
+    try:
+        content = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    if not has_namespace_declaration(content):
+        return None
+    return Path(init_file), is_only_namespace_init(content)
+
+
 def find_namespace_init_files(
     project_dir: Path,
 ) -> list[tuple[Path, bool]]:
@@ -228,30 +315,21 @@ def find_namespace_init_files(
     *edit* it (mixed content) — see ``is_only_namespace_init``.
     """
     results = []
-    for init_file in sorted(project_dir.rglob("__init__.py")):
-        # Skip hidden dirs, build dirs, egg-info
-        parts = init_file.relative_to(project_dir).parts
-        if any(
-            p.startswith(".") or p in ("build", "dist") or p.endswith(".egg-info")
-            for p in parts
-        ):
-            continue
-        try:
-            content = init_file.read_text(encoding="utf-8")
-        except (OSError, UnicodeDecodeError):
-            continue
-        if has_namespace_declaration(content):
-            results.append((init_file, is_only_namespace_init(content)))
+    for init_file in sorted(_iter_init_files(project_dir)):
+        result = _classify_init_file(init_file)
+        if result is not None:
+            results.append(result)
     return results
 
 
 def clean_setup_py_namespaces(project_dir: Path, dry_run: bool = False) -> bool:
     """Remove ``namespace_packages`` and related ``setup_requires`` from setup.py.
 
-    Uses AST to *verify* the keyword exists (reliable detection), then
-    does text-level removal (preserves formatting).  Pure-AST rewriting
-    would lose comments and whitespace; pure-regex could false-positive
-    on commented-out code.  The hybrid approach gives us the best of both.
+    Rewrites the ``setup()`` call with libcst: the keyword is located on
+    the syntax tree (no false positives on commented-out code) and the
+    lossless tree keeps all other formatting and comments intact — which
+    ``ast.unparse`` or line-oriented regexes over multi-line list
+    literals could not both guarantee.
 
     Also removes ``setup_requires=['setuptools']`` because that dependency
     only existed to support the pkg_resources namespace mechanism.
@@ -261,29 +339,21 @@ def clean_setup_py_namespaces(project_dir: Path, dry_run: bool = False) -> bool:
         return False
 
     content = setup_py.read_text(encoding="utf-8")
+    # Most setup.py files never mention it; skip the parse entirely
+    if "namespace_packages" not in content:
+        return False
 
-    # Use AST to verify the keyword exists, then do text-level removal
     try:
-        tree = ast.parse(content)
-    except SyntaxError:
+        module = cst.parse_module(content)
+    except cst.ParserSyntaxError:
         return False
 
-    has_ns_packages = False
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Call) and _is_setup_call(node):
-            for kw in node.keywords:
-                if kw.arg == "namespace_packages":
-                    has_ns_packages = True
-
-    if not has_ns_packages:
+    remover = _SetupKwargRemover()
+    new_module = module.visit(remover)
+    if not remover.found_namespace_packages:
         return False
 
-    # Text-level removal: namespace_packages=[...] (possibly multi-line)
-    new_content = _remove_setup_kwarg(content, "namespace_packages")
-
-    # Also remove setup_requires=['setuptools'] if present (only needed for pkg_resources ns)
-    new_content = _remove_setup_kwarg(new_content, "setup_requires")
-
+    new_content = new_module.code
     if new_content == content:
         return False
 
@@ -292,25 +362,53 @@ def clean_setup_py_namespaces(project_dir: Path, dry_run: bool = False) -> bool:
     return True
 
 
+# setup.cfg: namespace_packages = ... plus any indented continuation lines
+_RE_SETUP_CFG_NS = re.compile(
+    r"^namespace_packages\s*[=:].*(?:\n[ \t]+\S.*)*\n?",
+    re.MULTILINE,
+)
+# setup.cfg: the [options] header and the header of whatever section follows
+_RE_SETUP_CFG_OPTIONS = re.compile(r"^\[options\][ \t]*$", re.MULTILINE)
+_RE_SETUP_CFG_SECTION = re.compile(r"^\[", re.MULTILINE)
+
+
 def clean_setup_cfg_namespaces(project_dir: Path, dry_run: bool = False) -> bool:
     """Remove ``namespace_packages`` from setup.cfg ``[options]``.
 
     The ``namespace_packages`` option in setup.cfg has no PEP 621
-    equivalent — it must simply be removed.  The regex handles
-    continuation lines (indented values on subsequent lines) that
-    are common in multi-namespace packages.
+    equivalent — it must simply be removed.  Same hybrid as for setup.py:
+    ``configparser`` verifies the option is really set in ``[options]``,
+    then a text-level removal preserves comments and layout (writing
+    the parser back out would drop them).  The removal is confined to
+    the ``[options]`` section, so an option of the same name elsewhere
+    is left alone.  The regex handles continuation lines (indented
+    values on subsequent lines) that are common in multi-namespace
+    packages.
     """
     setup_cfg = project_dir / "setup.cfg"
     if not setup_cfg.exists():
         return False
 
     content = setup_cfg.read_text(encoding="utf-8")
-    # Match the namespace_packages line and any continuation lines (indented)
-    pattern = re.compile(
-        r"^namespace_packages\s*=.*(?:\n[ \t]+\S.*)*\n?",
-        re.MULTILINE,
-    )
-    new_content = pattern.sub("", content)
+    if "namespace_packages" not in content:
+        return False
+
+    cfg = configparser.ConfigParser(interpolation=None)
+    try:
+        cfg.read_string(content, source=str(setup_cfg))
+    except configparser.Error:
+        return False
+    if not cfg.has_option("options", "namespace_packages"):
+        return False
+
+    header = _RE_SETUP_CFG_OPTIONS.search(content)
+    if header is None:
+        return False
+    start = header.end()
+    next_section = _RE_SETUP_CFG_SECTION.search(content, start)
+    end = next_section.start() if next_section else len(content)
+    options = _RE_SETUP_CFG_NS.sub("", content[start:end])
+    new_content = content[:start] + options + content[end:]
 
     if new_content == content:
         return False
@@ -320,52 +418,61 @@ def clean_setup_cfg_namespaces(project_dir: Path, dry_run: bool = False) -> bool
     return True
 
 
-def _is_setup_call(node: ast.Call) -> bool:
-    """Check if an AST Call node is a ``setup()`` call.
+def _is_setup_call(node: cst.Call) -> bool:
+    """Check if a CST Call node is a ``setup()`` call.
 
     Matches both bare ``setup(...)`` and qualified ``setuptools.setup(...)``
     because Plone packages use both import styles.
     """
     func = node.func
-    if isinstance(func, ast.Name) and func.id == "setup":
-        return True
-    return isinstance(func, ast.Attribute) and func.attr == "setup"
+    if isinstance(func, cst.Name):
+        return func.value == "setup"
+    return isinstance(func, cst.Attribute) and func.attr.value == "setup"
+
+
+class _SetupKwargRemover(cst.CSTTransformer):
+    """Drop the namespace-related keyword arguments from ``setup()`` calls."""
+
+    REMOVED_KWARGS = frozenset({"namespace_packages", "setup_requires"})
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.found_namespace_packages = False
+
+    def leave_Call(self, original_node: cst.Call, updated_node: cst.Call) -> cst.Call:
+        if not _is_setup_call(updated_node):
+            return updated_node
+        args = updated_node.args
+        kept = [
+            arg
+            for arg in args
+            if arg.keyword is None or arg.keyword.value not in self.REMOVED_KWARGS
+        ]
+        if len(kept) == len(args):
+            return updated_node
+        if any(
+            arg.keyword is not None and arg.keyword.value == "namespace_packages"
+            for arg in args
+        ):
+            self.found_namespace_packages = True
+        # The last argument's comma carries the whitespace before ``)``;
+        # hand it to the new last argument so the layout stays intact
+        if kept and kept[-1] is not args[-1]:
+            kept[-1] = kept[-1].with_changes(comma=args[-1].comma)
+        return updated_node.with_changes(args=kept)
 
 
-def _remove_setup_kwarg(content: str, kwarg_name: str) -> str:
-    """Remove a keyword argument from a ``setup()`` call in source text.
+def _rewrite_file(filepath: Path, old: bytes, new: bytes) -> None:
+    """Replace the contents of *filepath* (currently *old*) with *new*.
 
-    Uses cascading regex patterns (single-line list, multi-line list,
-    simple value) because setup.py files in the wild use all three
-    formats.  Each pattern is tried in order; the first match wins.
-    This is intentionally text-level (not AST-based) to preserve the
-    surrounding formatting and comments.
+    When the declaration was the tail of the file, the new contents are a
+    prefix of the old ones and truncating in place is enough.  Files are
+    handled as bytes so line endings survive unchanged.
     """
-    # Pattern: kwarg_name=[...] or kwarg_name=<value>, possibly multi-line
-    # We match from kwarg_name= to the closing bracket/comma
-    pattern = re.compile(
-        rf"^(\s*){kwarg_name}\s*=\s*\[.*?\][ \t]*,?[ \t]*\n?",
-        re.MULTILINE | re.DOTALL,
-    )
-    result = pattern.sub("", content)
-    if result != content:
-        return result
-
-    # Try multi-line: kwarg_name=[\n  ...\n],
-    pattern_ml = re.compile(
-        rf"^\s*{kwarg_name}\s*=\s*\[.*?\]\s*,?\s*$",
-        re.MULTILINE | re.DOTALL,
-    )
-    result = pattern_ml.sub("", content)
-    if result != content:
-        return result
-
-    # Simple value: kwarg_name='something',
-    pattern_simple = re.compile(
-        rf"^\s*{kwarg_name}\s*=.*,?\s*$\n?",
-        re.MULTILINE,
-    )
-    return pattern_simple.sub("", content)
+    if old.startswith(new):
+        os.truncate(filepath, len(new))
+    else:
+        filepath.write_bytes(new)
 
 
 # ---------------------------------------------------------------------------
@@ -408,11 +515,12 @@ def migrate_namespaces(
                 filepath.unlink()
             deleted.append(filepath)
         else:
-            content = filepath.read_text(encoding="utf-8")
+            data = filepath.read_bytes()
+            content = data.decode("utf-8")
             new_content = remove_namespace_declaration(content)
             if new_content != content:
                 if not dry_run:
-                    filepath.write_text(new_content, encoding="utf-8")
+                    _rewrite_file(filepath, data, new_content.encode("utf-8"))
                 modified.append(filepath)
 
     # 2. Clean setup.py
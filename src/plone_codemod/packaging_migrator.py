@@ -15,13 +15,16 @@ pycodestyle) to their ruff equivalents, since ruff supersedes these
 tools and its config lives natively in pyproject.toml.
 """
 
+from functools import lru_cache
 from pathlib import Path
 
 import ast
 import configparser
+import os
 import re
 import tomlkit
 import tomlkit.items
+import tomllib
 
 
 # ---------------------------------------------------------------------------
@@ -41,10 +44,13 @@ def parse_setup_py(path: Path) -> dict:
 
     Returns a dict with keys matching setup() keyword arguments.
     """
-    content = path.read_text(encoding="utf-8")
-    try:
-        tree = ast.parse(content, filename=str(path))
-    except SyntaxError:
+    return _parse_setup_py_from_source(path.read_bytes())
+
+
+def _parse_setup_py_from_source(source: str | bytes) -> dict:
+    """Extract setup() metadata from in-memory setup.py *source*."""
+    tree = _parse_source(source)
+    if tree is None:
         return {}
 
     # Collect module-level variable assignments
@@ -58,6 +64,21 @@ def parse_setup_py(path: Path) -> dict:
     return {}
 
 
+@lru_cache(maxsize=32)
+def _parse_source(source: str | bytes) -> ast.Module | None:
+    """Parse setup.py *source*, or return None if it is not valid Python.
+
+    Cached by source text: migration runs and the test suite parse the
+    same few setup.py files repeatedly.  Given raw bytes, ``ast``
+    honours a PEP 263 encoding cookie.  The trees are only ever
+    read, so sharing them is safe.
+    """
+    try:
+        return ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+
 def _collect_module_vars(tree: ast.Module) -> dict:
     """Collect simple module-level variable assignments.
 
@@ -388,6 +409,30 @@ def _parse_cfg_list(value: str) -> list[str]:
 # ---------------------------------------------------------------------------
 
 
+# The setup.cfg sections convert_tool_configs knows how to translate
+_TOOL_SECTIONS = (
+    "flake8",
+    "isort",
+    "pycodestyle",
+    "pep8",
+    "pydocstyle",
+    "tool:pytest",
+    "pytest",
+    "coverage:run",
+    "coverage:report",
+    "check-manifest",
+)
+
+
+def _read_tool_sections(path: str) -> dict[str, dict[str, str]]:
+    """Return the convertible tool sections of the setup.cfg at *path*."""
+    cfg = configparser.ConfigParser(interpolation=None)
+    cfg.read(path, encoding="utf-8")
+    return {
+        name: dict(cfg.items(name)) for name in _TOOL_SECTIONS if cfg.has_section(name)
+    }
+
+
 def convert_tool_configs(path: Path) -> dict:
     """Extract tool configuration sections from setup.cfg and convert them.
 
@@ -402,64 +447,63 @@ def convert_tool_configs(path: Path) -> dict:
 
     Returns a dict suitable for merging into pyproject.toml's ``[tool.*]``.
     """
-    cfg = configparser.ConfigParser()
-    cfg.read(str(path), encoding="utf-8")
+    sections = _read_tool_sections(str(path))
 
     tools: dict = {}
 
     # flake8 → ruff
-    if cfg.has_section("flake8"):
-        ruff, ruff_lint = _convert_flake8(cfg)
+    if "flake8" in sections:
+        ruff, ruff_lint = _convert_flake8(sections["flake8"])
         tools.setdefault("ruff", {}).update(ruff)
         tools.setdefault("ruff", {}).setdefault("lint", {}).update(ruff_lint)
 
     # isort → ruff.lint.isort
-    if cfg.has_section("isort"):
-        isort_cfg = _convert_isort(cfg)
+    if "isort" in sections:
+        isort_cfg = _convert_isort(sections["isort"])
         tools.setdefault("ruff", {}).setdefault("lint", {}).setdefault(
             "isort", {}
         ).update(isort_cfg)
 
     # pycodestyle / pep8 → ruff
     for section in ("pycodestyle", "pep8"):
-        if cfg.has_section(section):
-            ruff, ruff_lint = _convert_pycodestyle(cfg, section)
+        if section in sections:
+            ruff, ruff_lint = _convert_pycodestyle(sections[section])
             tools.setdefault("ruff", {}).update(ruff)
             tools.setdefault("ruff", {}).setdefault("lint", {}).update(ruff_lint)
 
     # pydocstyle → ruff.lint.pydocstyle
-    if cfg.has_section("pydocstyle"):
-        pydoc_cfg = _convert_pydocstyle(cfg)
+    if "pydocstyle" in sections:
+        pydoc_cfg = _convert_pydocstyle(sections["pydocstyle"])
         tools.setdefault("ruff", {}).setdefault("lint", {}).setdefault(
             "pydocstyle", {}
         ).update(pydoc_cfg)
 
     # tool:pytest / pytest → pytest.ini_options
     for section in ("tool:pytest", "pytest"):
-        if cfg.has_section(section):
-            tools["pytest"] = {"ini_options": _convert_pytest(cfg, section)}
+        if section in sections:
+            tools["pytest"] = {"ini_options": _convert_pytest(sections[section])}
             break
 
     # coverage:run → coverage.run
-    if cfg.has_section("coverage:run"):
+    if "coverage:run" in sections:
         tools.setdefault("coverage", {})["run"] = _convert_coverage_section(
-            cfg, "coverage:run"
+            sections["coverage:run"]
         )
 
     # coverage:report → coverage.report
-    if cfg.has_section("coverage:report"):
+    if "coverage:report" in sections:
         tools.setdefault("coverage", {})["report"] = _convert_coverage_section(
-            cfg, "coverage:report"
+            sections["coverage:report"]
         )
 
     # check-manifest → check-manifest
-    if cfg.has_section("check-manifest"):
-        tools["check-manifest"] = dict(cfg.items("check-manifest"))
+    if "check-manifest" in sections:
+        tools["check-manifest"] = dict(sections["check-manifest"])
 
     return tools
 
 
-def _convert_flake8(cfg: configparser.ConfigParser) -> tuple[dict, dict]:
+def _convert_flake8(options: dict[str, str]) -> tuple[dict, dict]:
     """Convert ``[flake8]`` to ruff top-level and ``ruff.lint`` settings.
 
     ``max-line-length`` maps to ruff's top-level ``line-length`` (not
@@ -468,7 +512,7 @@ def _convert_flake8(cfg: configparser.ConfigParser) -> tuple[dict, dict]:
     ruff: dict = {}
     ruff_lint: dict = {}
 
-    for key, val in cfg.items("flake8"):
+    for key, val in options.items():
         if key == "max-line-length" or key == "max_line_length":
             ruff["line-length"] = int(val)
         elif key == "ignore":
@@ -485,7 +529,7 @@ def _convert_flake8(cfg: configparser.ConfigParser) -> tuple[dict, dict]:
     return ruff, ruff_lint
 
 
-def _convert_isort(cfg: configparser.ConfigParser) -> dict:
+def _convert_isort(options: dict[str, str]) -> dict:
     """Convert ``[isort]`` to ``ruff.lint.isort`` settings.
 
     Key names are translated from Python underscore style to ruff's
@@ -504,7 +548,7 @@ def _convert_isort(cfg: configparser.ConfigParser) -> dict:
         "order_by_type": "order-by-type",
     }
 
-    for key, val in cfg.items("isort"):
+    for key, val in options.items():
         if key in key_map:
             # Lists
             if key in ("known_first_party", "known_third_party"):
@@ -529,14 +573,12 @@ def _convert_isort(cfg: configparser.ConfigParser) -> dict:
     return result
 
 
-def _convert_pycodestyle(
-    cfg: configparser.ConfigParser, section: str
-) -> tuple[dict, dict]:
+def _convert_pycodestyle(options: dict[str, str]) -> tuple[dict, dict]:
     """Convert [pycodestyle] or [pep8] to ruff settings."""
     ruff: dict = {}
     ruff_lint: dict = {}
 
-    for key, val in cfg.items(section):
+    for key, val in options.items():
         if key == "max-line-length" or key == "max_line_length":
             ruff["line-length"] = int(val)
         elif key == "ignore":
@@ -547,10 +589,10 @@ def _convert_pycodestyle(
     return ruff, ruff_lint
 
 
-def _convert_pydocstyle(cfg: configparser.ConfigParser) -> dict:
+def _convert_pydocstyle(options: dict[str, str]) -> dict:
     """Convert [pydocstyle] to ruff.lint.pydocstyle settings."""
     result: dict = {}
-    for key, val in cfg.items("pydocstyle"):
+    for key, val in options.items():
         if key == "convention":
             result["convention"] = val
         elif key in ("match-dir", "match_dir"):
@@ -558,10 +600,10 @@ def _convert_pydocstyle(cfg: configparser.ConfigParser) -> dict:
     return result
 
 
-def _convert_pytest(cfg: configparser.ConfigParser, section: str) -> dict:
+def _convert_pytest(options: dict[str, str]) -> dict:
     """Convert [tool:pytest] or [pytest] to tool.pytest.ini_options."""
     result: dict = {}
-    for key, val in cfg.items(section):
+    for key, val in options.items():
         if key in ("testpaths", "python_files", "python_classes", "python_functions"):
             result[key] = _parse_cfg_list(val)
         elif key == "addopts":
@@ -573,10 +615,10 @@ def _convert_pytest(cfg: configparser.ConfigParser, section: str) -> dict:
     return result
 
 
-def _convert_coverage_section(cfg: configparser.ConfigParser, section: str) -> dict:
+def _convert_coverage_section(options: dict[str, str]) -> dict:
     """Convert [coverage:run] or [coverage:report] to tool.coverage.* settings."""
     result: dict = {}
-    for key, val in cfg.items(section):
+    for key, val in options.items():
         if key in ("source", "omit", "include"):
             result[key] = _parse_cfg_list(val)
         elif key in ("show_missing", "branch"):
@@ -626,13 +668,71 @@ def generate_pyproject_toml(
     other manual configuration.
 
     If existing_pyproject is given, merges into it preserving existing sections.
+    As long as it has no ``[project]`` table, the new tables are rendered on
+    their own and appended to the untouched existing text, which spares a
+    full tomlkit round-trip of the file.
+    """
+    present = tomllib.loads(existing_pyproject) if existing_pyproject else {}
+    if existing_pyproject and "project" not in present:
+        new_tables = tomlkit.document()
+        _add_new_tables(new_tables, present, metadata, tool_configs)
+        content = f"{existing_pyproject.rstrip()}\n\n{tomlkit.dumps(new_tables)}"
+        try:
+            tomllib.loads(content)
+        except tomllib.TOMLDecodeError:
+            # e.g. an existing dotted-key or inline [tool.hatch] that the
+            # appended tables would redefine — merge structurally instead.
+            pass
+        else:
+            return content
+
+    doc = _build_pyproject_doc(metadata, existing_pyproject, tool_configs, present)
+    return tomlkit.dumps(doc)
+
+
+def _build_pyproject_doc(
+    metadata: dict,
+    existing_pyproject: str | None = None,
+    tool_configs: dict | None = None,
+    present: dict | None = None,
+) -> tomlkit.TOMLDocument:
+    """Return *existing_pyproject* (or a new document) with the tables merged in.
+
+    *present* is the ``tomllib`` view of *existing_pyproject*, for callers
+    that have already parsed it.
     """
+    if present is None:
+        present = tomllib.loads(existing_pyproject) if existing_pyproject else {}
     doc = (
         tomlkit.parse(existing_pyproject) if existing_pyproject else tomlkit.document()
     )
+    _add_new_tables(doc, present, metadata, tool_configs)
+    return doc
 
+
+def _has_table(data: dict, *keys: str) -> bool:
+    """Return True if the nested *keys* path exists in the parsed TOML *data*."""
+    for key in keys:
+        if not isinstance(data, dict) or key not in data:
+            return False
+        data = data[key]
+    return True
+
+
+def _add_new_tables(
+    doc: tomlkit.TOMLDocument,
+    present: dict,
+    metadata: dict,
+    tool_configs: dict | None,
+) -> None:
+    """Add the generated tables missing from *present* to *doc*.
+
+    *present* is the plain ``tomllib`` view of the existing pyproject.toml
+    (empty if there is none); *doc* is either that document parsed with
+    tomlkit or a fresh document that will be appended to it.
+    """
     # Build system
-    if "build-system" not in doc:
+    if "build-system" not in present:
         bs = tomlkit.table()
         requires = tomlkit.array()
         requires.append("hatchling")
@@ -643,7 +743,7 @@ def generate_pyproject_toml(
         doc.add("build-system", bs)
 
     # [project]
-    if "project" not in doc:
+    if "project" not in present:
         project = tomlkit.table()
         _populate_project_table(project, metadata)
         doc.add("project", project)
@@ -677,11 +777,17 @@ def generate_pyproject_toml(
     packages_val = metadata.get("packages", "")
     if isinstance(packages_val, str) and packages_val.startswith("find_packages:"):
         where = packages_val.split(":", 1)[1]
-        if where and where != ".":
+        if (
+            where
+            and where != "."
+            and not _has_table(present, "tool", "hatch", "build", "targets", "wheel")
+        ):
             _ensure_hatch_wheel_config(doc, metadata, where)
 
     # [tool.hatch.version]
-    if _is_dynamic_version(metadata):
+    if _is_dynamic_version(metadata) and not _has_table(
+        present, "tool", "hatch", "version"
+    ):
         hatch = doc.setdefault("tool", tomlkit.table()).setdefault(
             "hatch", tomlkit.table()
         )
@@ -690,14 +796,17 @@ def generate_pyproject_toml(
         hatch.add("version", version_tbl)
 
     # Tool configurations from setup.cfg
-    if tool_configs:
+    new_tools = {
+        tool_name: tool_cfg
+        for tool_name, tool_cfg in (tool_configs or {}).items()
+        if not _has_table(present, "tool", tool_name)
+    }
+    if new_tools:
         tool_section = doc.setdefault("tool", tomlkit.table())
-        for tool_name, tool_cfg in tool_configs.items():
+        for tool_name, tool_cfg in new_tools.items():
             if tool_name not in tool_section:
                 tool_section.add(tool_name, _dict_to_tomlkit(tool_cfg))
 
-    return tomlkit.dumps(doc)
-
 
 def _populate_project_table(project: tomlkit.items.Table, metadata: dict) -> None:
     """Populate the ``[project]`` table with PEP 621 metadata.
@@ -878,35 +987,46 @@ def _add_entry_points(doc: tomlkit.TOMLDocument, metadata: dict) -> None:
     if not project:
         return
 
+    # Created on first use so that console/gui scripts alone don't leave
+    # an empty [project.entry-points] table behind.
+    ep_section = None
     for group, entries in entry_points.items():
+        table = _entry_points_table(entries)
         if group == "console_scripts":
-            scripts = tomlkit.table()
-            for entry in entries:
-                name, _, value = entry.partition("=")
-                scripts.add(name.strip(), value.strip())
-            project.add("scripts", scripts)
+            project.add("scripts", table)
         elif group == "gui_scripts":
-            scripts = tomlkit.table()
-            for entry in entries:
-                name, _, value = entry.partition("=")
-                scripts.add(name.strip(), value.strip())
-            project.add("gui-scripts", scripts)
+            project.add("gui-scripts", table)
         else:
-            eps = doc.setdefault("project", tomlkit.table())
-            ep_section = eps.setdefault("entry-points", tomlkit.table())
-            group_table = tomlkit.table()
-            for entry in entries:
-                name, _, value = entry.partition("=")
-                group_table.add(name.strip(), value.strip())
-            ep_section.add(group, group_table)
+            if ep_section is None:
+                ep_section = project.setdefault("entry-points", tomlkit.table())
+            ep_section.add(group, table)
+
+
+def _entry_points_table(entries: list[str]) -> tomlkit.items.Table:
+    """Build a table from ``name = value`` strings."""
+    table = tomlkit.table()
+    for entry in entries:
+        name, _, value = entry.partition("=")
+        table.add(name.strip(), value.strip())
+    return table
+
+
+# One INI line: either a ``[section]`` header or a ``name = value`` entry.
+# Comment lines (``#``/``;``) and blank lines match neither alternative.
+_ENTRY_POINT_LINE_RE = re.compile(
+    r"^[ \t]*(?:\[(?P<section>[^\]]+)\]"
+    r"|(?P<key>[^=\s#;][^=\n]*?)[ \t]*=[ \t]*(?P<value>[^\n]*?))[ \t]*$",
+    re.MULTILINE,
+)
 
 
 def _parse_entry_points_string(text: str) -> dict:
     """Parse INI-style entry_points string format.
 
     Older setup.py files pass ``entry_points`` as a multi-line string
-    rather than a dict.  The format is identical to INI/configparser
-    syntax, so we reuse ``configparser`` to parse it.
+    rather than a dict.  The format is a flat subset of INI, so a single
+    precompiled regex scan is enough — no ``configparser`` round-trip,
+    which would also lowercase the (case-sensitive) entry point names.
 
     Example input::
 
@@ -915,14 +1035,14 @@ def _parse_entry_points_string(text: str) -> dict:
         [z3c.autoinclude.plugin]
         target = plone
     """
-    cfg = configparser.ConfigParser()
-    cfg.read_string(text)
-    result = {}
-    for section in cfg.sections():
-        entries = []
-        for key, val in cfg.items(section):
-            entries.append(f"{key} = {val}")
-        result[section] = entries
+    result: dict = {}
+    entries: list[str] | None = None
+    for match in _ENTRY_POINT_LINE_RE.finditer(text):
+        section = match.group("section")
+        if section is not None:
+            entries = result.setdefault(section.strip(), [])
+        elif entries is not None:
+            entries.append(f"{match.group('key')} = {match.group('value')}")
     return result
 
 
@@ -953,27 +1073,17 @@ def _ensure_hatch_wheel_config(
         targets.add("wheel", wheel)
 
 
-def _dict_to_tomlkit(d: dict) -> tomlkit.items.Table:
-    """Recursively convert a plain dict to a tomlkit Table.
+def _dict_to_tomlkit(d: dict) -> tomlkit.items.Item:
+    """Convert a plain dict to a tomlkit Table.
 
     Needed because tomlkit requires its own container types for
     serialization — plain dicts would lose type information
-    (booleans serialized as strings, etc.).
+    (booleans serialized as strings, etc.).  ``tomlkit.item`` does the
+    recursive conversion itself; the values produced by the tool config
+    converters are all native TOML types (str, bool, int, float, list,
+    dict), so no coercion is needed beforehand.
     """
-    table = tomlkit.table()
-    for key, val in d.items():
-        if isinstance(val, dict):
-            table.add(key, _dict_to_tomlkit(val))
-        elif isinstance(val, list):
-            arr = tomlkit.array()
-            for item in val:
-                arr.append(item)
-            table.add(key, arr)
-        elif isinstance(val, (bool, int, float)):
-            table.add(key, val)
-        else:
-            table.add(key, str(val))
-    return table
+    return tomlkit.item(d)
 
 
 # ---------------------------------------------------------------------------
@@ -981,6 +1091,20 @@ def _dict_to_tomlkit(d: dict) -> tomlkit.items.Table:
 # ---------------------------------------------------------------------------
 
 
+# MANIFEST.in rules that are safe to ignore — hatchling handles them.
+_MANIFEST_BOILERPLATE_RE = re.compile(
+    r"^\s*(?:#.*"  # comments
+    r"|graft\s+(?:src|docs?)"
+    r"|recursive-include\s+(?:src|docs?)\s+\*"
+    r"|include\s+\*\.(?:rst|md|txt|cfg|toml)"
+    r"|include\s+(?:LICENSE|LICEN[CS]E\..*|COPYING|NOTICE|AUTHORS|CONTRIBUTORS|tox\.ini|Makefile|pyproject\.toml)(?:\s|$)"
+    r"|global-exclude\s+\*\.py[cod]"
+    r"|global-exclude\s+__pycache__"
+    r")$",
+    re.IGNORECASE,
+)
+
+
 def _check_manifest_in(project_dir: Path) -> list[str]:
     """Warn about non-boilerplate MANIFEST.in rules that may need manual porting.
 
@@ -994,25 +1118,12 @@ def _check_manifest_in(project_dir: Path) -> list[str]:
     if not manifest.exists():
         return []
 
-    # Patterns that are safe to ignore — hatchling handles them.
-    boilerplate = re.compile(
-        r"^\s*(?:#.*"  # comments
-        r"|graft\s+(?:src|docs?)"
-        r"|recursive-include\s+(?:src|docs?)\s+\*"
-        r"|include\s+\*\.(?:rst|md|txt|cfg|toml)"
-        r"|include\s+(?:LICENSE|LICEN[CS]E\..*|COPYING|NOTICE|AUTHORS|CONTRIBUTORS|tox\.ini|Makefile|pyproject\.toml)(?:\s|$)"
-        r"|global-exclude\s+\*\.py[cod]"
-        r"|global-exclude\s+__pycache__"
-        r")$",
-        re.IGNORECASE,
-    )
-
     warnings: list[str] = []
     for line in manifest.read_text(encoding="utf-8").splitlines():
         stripped = line.strip()
         if not stripped:
             continue
-        if not boilerplate.match(stripped):
+        if not _MANIFEST_BOILERPLATE_RE.match(stripped):
             warnings.append(f"MANIFEST.in rule may need manual porting: {stripped}")
     return warnings
 
@@ -1024,17 +1135,33 @@ def cleanup_old_files(project_dir: Path, dry_run: bool = False) -> list[Path]:
     MANIFEST.in is also removed because hatchling uses its own inclusion
     logic (and respects .gitignore).  Keeping them around would cause
     confusion about which file is the source of truth.
+
+    Existence is checked against a single directory listing rather than
+    one ``stat`` per candidate, which matters on networked filesystems.
     """
+    try:
+        with os.scandir(project_dir) as it:
+            names = {entry.name for entry in it if entry.is_file()}
+    except OSError:
+        return []
+
     deleted = []
     for name in ("setup.py", "setup.cfg", "MANIFEST.in"):
-        filepath = project_dir / name
-        if filepath.exists():
+        if name in names:
+            filepath = project_dir / name
             if not dry_run:
                 filepath.unlink()
             deleted.append(filepath)
     return deleted
 
 
+# A full pre-commit repo block for check-manifest: "-  repo: <url>" (with
+# optional spaces) through to the next "- repo:" or end of the "repos:" list.
+_CHECK_MANIFEST_REPO_RE = re.compile(
+    r"(?m)^[ \t]*-\s*repo:\s*\S*check-manifest\S*\n(?:(?![ \t]*-\s*repo:).*\n)*"
+)
+
+
 def cleanup_pre_commit_check_manifest(
     project_dir: Path, dry_run: bool = False
 ) -> list[Path]:
@@ -1055,14 +1182,7 @@ def cleanup_pre_commit_check_manifest(
     if "check-manifest" not in content:
         return []
 
-    # Match a full repo block for check-manifest.
-    # Pattern: "-  repo: <url>" (with optional spaces) through to the next
-    # "- repo:" or end of the "repos:" list.
-    cleaned = re.sub(
-        r"(?m)^[ \t]*-\s*repo:\s*\S*check-manifest\S*\n(?:(?![ \t]*-\s*repo:).*\n)*",
-        "",
-        content,
-    )
+    cleaned = _CHECK_MANIFEST_REPO_RE.sub("", content)
 
     if cleaned == content:
         return []
@@ -1077,6 +1197,12 @@ def cleanup_pre_commit_check_manifest(
 # ---------------------------------------------------------------------------
 
 
+# Cheap pre-filter: a pyproject.toml without the word ``project`` cannot
+# define a ``project`` table (header, inline table or dotted keys), so
+# only files that match are parsed.
+_PROJECT_KEY_RE = re.compile(r"\bproject\b")
+
+
 def migrate_packaging(
     project_dir: Path,
     dry_run: bool = False,
@@ -1131,19 +1257,15 @@ def migrate_packaging(
     if pyproject_path.exists():
         existing = pyproject_path.read_text(encoding="utf-8")
         # If [project] section already exists, don't overwrite
-        try:
-            parsed = tomlkit.parse(existing)
-            if "project" in parsed:
-                result_warnings.append(
-                    "pyproject.toml already has [project] section, skipping migration"
-                )
-                return {
-                    "created_files": created,
-                    "deleted_files": deleted,
-                    "warnings": result_warnings,
-                }
-        except Exception:
-            pass
+        if _PROJECT_KEY_RE.search(existing) and "project" in tomllib.loads(existing):
+            result_warnings.append(
+                "pyproject.toml already has [project] section, skipping migration"
+            )
+            return {
+                "created_files": created,
+                "deleted_files": deleted,
+                "warnings": result_warnings,
+            }
 
     # 6. Generate pyproject.toml
     content = generate_pyproject_toml(metadata, existing, tool_configs)
@@ -10,19 +10,16 @@ Optional Bootstrap 3→5 migration (--bootstrap flag):
 """
 
 from collections.abc import Callable
+from functools import lru_cache
 from pathlib import Path
+from plone_codemod._common import CONFIG_PATH
+from plone_codemod._common import iter_files
+from plone_codemod._common import load_config
+from plone_codemod._common import memoized
+from plone_codemod._common import overwrite
 from typing import Any
 
 import warnings
-import yaml
-
-
-CONFIG_PATH = Path(__file__).resolve().parent / "migration_config.yaml"
-
-
-def load_config(config_path: Path = CONFIG_PATH) -> dict[str, Any]:
-    with open(config_path) as fh:
-        return yaml.safe_load(fh)
 
 
 def migrate_pt_content(
@@ -36,32 +33,64 @@ def migrate_pt_content(
     return result
 
 
+@lru_cache(maxsize=32)
+def _guarded_runs(
+    pairs: tuple[tuple[str, str], ...],
+) -> tuple[tuple[str, tuple[tuple[str, str], ...]], ...]:
+    """Group consecutive ``(old, new)`` pairs that share a common prefix.
+
+    Returns ``(prefix, pairs)`` runs in the original order.  When a run's
+    prefix does not occur in the text, none of its rules can match, so the
+    whole run is skipped with one scan instead of one per rule.  Chained
+    rules (``label label-`` → ``badge bg-``, then ``badge`` → ...) behave
+    exactly as with plain sequential replacement.
+    """
+    runs = []
+    start = 0
+    while start < len(pairs):
+        end = start + 1
+        prefix = pairs[start][0]
+        while end < len(pairs):
+            common = prefix
+            while not pairs[end][0].startswith(common):
+                common = common[:-1]
+            if len(common) < 4:
+                break
+            prefix = common
+            end += 1
+        runs.append((prefix, pairs[start:end]))
+        start = end
+    return tuple(runs)
+
+
 def migrate_bootstrap_content(
     content: str,
     data_attributes: list[dict[str, str]],
     css_classes: list[dict[str, str]],
 ) -> str:
     """Apply Bootstrap 3→5 migrations to HTML/PT content."""
+    pairs = tuple((e["old"], e["new"]) for e in (*data_attributes, *css_classes))
     result = content
-    for entry in data_attributes:
-        result = result.replace(entry["old"], entry["new"])
-    for entry in css_classes:
-        result = result.replace(entry["old"], entry["new"])
+    for prefix, run in _guarded_runs(pairs):
+        if prefix in result:
+            for old, new in run:
+                result = result.replace(old, new)
     return result
 
 
 def _migrate_files(
     root: Path,
-    pattern: str,
+    suffixes: tuple[str, ...],
     transformer: Callable[..., str],
     dry_run: bool = False,
     **kwargs: Any,
 ) -> list[Path]:
     """Walk directory, apply transformer to matching files."""
+    transform = memoized(transformer, **kwargs)
     modified = []
-    for filepath in sorted(root.rglob(pattern)):
+    for filepath in iter_files(root, suffixes):
         try:
-            content = filepath.read_text(encoding="utf-8")
+            content = filepath.read_bytes().decode("utf-8")
         except UnicodeDecodeError:
             warnings.warn(
                 f"{filepath} is not UTF-8 encoded — skipping. "
@@ -71,12 +100,14 @@ def _migrate_files(
             continue
         except OSError:
             continue
-        new_content = transformer(content, **kwargs)
+        new_content = transform(content)
         if new_content != content:
             modified.append(filepath)
             if not dry_run:
-                filepath.write_text(new_content, encoding="utf-8")
-    return modified
+                overwrite(filepath, new_content.encode("utf-8"))
+    # Walk order is filesystem-dependent; sorting just the modified
+    # paths is enough for stable reporting.
+    return sorted(modified)
 
 
 def migrate_pt_files(
@@ -91,7 +122,7 @@ def migrate_pt_files(
         return []
     return _migrate_files(
         root,
-        "*.pt",
+        (".pt",),
         migrate_pt_content,
         dry_run=dry_run,
         replacements=replacements,
@@ -112,16 +143,11 @@ def migrate_bootstrap_files(
     if not data_attributes and not css_classes:
         return []
 
-    modified = []
-    for pattern in ("*.pt", "*.html"):
-        modified.extend(
-            _migrate_files(
-                root,
-                pattern,
-                migrate_bootstrap_content,
-                dry_run=dry_run,
-                data_attributes=data_attributes,
-                css_classes=css_classes,
-            )
-        )
-    return modified
+    return _migrate_files(
+        root,
+        (".pt", ".html"),
+        migrate_bootstrap_content,
+        dry_run=dry_run,
+        data_attributes=data_attributes,
+        css_classes=css_classes,
+    )
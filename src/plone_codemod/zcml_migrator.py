@@ -9,14 +9,24 @@ references and view name references that need updating.
 """
 
 from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Sequence
+from functools import lru_cache
 from pathlib import Path
+from plone_codemod._common import CONFIG_PATH
+from plone_codemod._common import iter_files
+from plone_codemod._common import load_config
+from plone_codemod._common import memoized
+from plone_codemod._common import overwrite
 from typing import Any
 
+import mmap
+import re
 import warnings
-import yaml
 
 
-CONFIG_PATH = Path(__file__).resolve().parent / "migration_config.yaml"
+# Files larger than this are pre-scanned through mmap before being read
+MMAP_THRESHOLD = 64 * 1024
 
 # ZCML/XML attributes that may contain Python dotted names
 DOTTED_NAME_ATTRS = [
@@ -36,37 +46,125 @@ DOTTED_NAME_ATTRS = [
 ]
 
 
-def load_config(config_path: Path = CONFIG_PATH) -> dict[str, Any]:
-    with open(config_path) as fh:
-        return yaml.safe_load(fh)
-
-
-def _build_replacements(entries: list[dict[str, str]]) -> list[tuple[str, str]]:
+def _build_replacements(entries: list[dict[str, str]]) -> "_ReplacementTable":
     """Build sorted replacement pairs (longest old first to avoid partial matches)."""
     pairs = [(e["old"], e["new"]) for e in entries]
     pairs.sort(key=lambda p: len(p[0]), reverse=True)
-    return pairs
+    return _ReplacementTable(pairs)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build regex source matching any of *words*, factored as a prefix trie.
+
+    ``re`` tries the branches of a flat ``a|b|c`` alternation one by one
+    wherever the first character fits.  Dotted names share long prefixes
+    (``Products.CMFPlone.``), so text full of near misses — unrelated
+    ``Products.CMFPlone.*`` references — re-compared the same prefix
+    against every alternative; the trie compares it once.  A node's
+    children are tried before a word may end there (greedy ``?``), so the
+    longest word matching at a position still wins.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [
+            re.escape(char) + build(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        ends_here = "" in node
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if ends_here else group
+
+    return build(trie)
+
+
+@lru_cache(maxsize=32)
+def _compile_replacements(
+    replacements: tuple[tuple[str, str], ...],
+) -> tuple[re.Pattern[str] | None, dict[str, str]]:
+    """Compile replacement pairs into one pattern plus a lookup table.
+
+    A single ``re.sub`` pass over the content is much cheaper than one
+    ``str.replace`` pass per mapping (there are ~200 of them).  The trie
+    pattern prefers the longest old name at any position — the same
+    guarantee the longest-first sequential replacement gave.
+    """
+    if not replacements:
+        return None, {}
+    pattern = re.compile(_trie_pattern(old for old, _ in replacements))
+    # reversed() so that the first mapping for a duplicated old name wins,
+    # as it did when the replacements were applied one after another.
+    return pattern, dict(reversed(replacements))
+
+
+class _ReplacementTable(tuple):
+    """Frozen ``(old, new)`` pairs carrying their precompiled matcher.
+
+    Applying a plain sequence of pairs has to look the compiled pattern up
+    by value, and hashing ~200 pairs costs about as much as the
+    substitution itself on a typical small file.  The table compiles once
+    on construction, so applying it is a plain attribute access.
+    """
+
+    pattern: re.Pattern[str] | None
+    mapping: dict[str, str]
+
+    def __new__(cls, pairs):
+        self = super().__new__(cls, pairs)
+        self.pattern, self.mapping = _compile_replacements(self)
+        return self
+
+
+@lru_cache(maxsize=32)
+def _compiled_for(
+    config_path: Path,
+) -> tuple[_ReplacementTable, dict[str, str] | None]:
+    """Return ``(replacements, view_replacements)`` for *config_path*.
+
+    The ZCML and GenericSetup phases both derive their dotted-name
+    replacements from the ``imports`` section, so caching per config
+    file means the YAML is parsed and the alternation compiled once
+    per run instead of once per phase.
+    """
+    config = load_config(config_path)
+    replacements = _build_replacements(config.get("imports", []))
+    view_replacements = config.get("genericsetup", {}).get("view_replacements")
+    return replacements, view_replacements
 
 
-def migrate_zcml_content(content: str, replacements: list[tuple[str, str]]) -> str:
+def _apply_replacements(content: str, replacements: Sequence[tuple[str, str]]) -> str:
+    """Replace every old dotted name in *content* in a single pass."""
+    if isinstance(replacements, _ReplacementTable):
+        pattern, mapping = replacements.pattern, replacements.mapping
+    else:
+        pattern, mapping = _compile_replacements(tuple(replacements))
+    if pattern is None:
+        return content
+    return pattern.sub(lambda m: mapping[m.group(0)], content)
+
+
+def migrate_zcml_content(content: str, replacements: Sequence[tuple[str, str]]) -> str:
     """Apply dotted-name replacements to ZCML content."""
-    result = content
-    for old, new in replacements:
-        # Match dotted names inside attribute values (quoted)
-        # We replace anywhere the old string appears inside quotes
-        result = result.replace(old, new)
-    return result
+    # Dotted names are replaced anywhere they appear, which covers
+    # attribute values (quoted) as well as element text.
+    return _apply_replacements(content, replacements)
 
 
 def migrate_genericsetup_content(
     content: str,
-    replacements: list[tuple[str, str]],
+    replacements: Sequence[tuple[str, str]],
     view_replacements: dict[str, str] | None = None,
 ) -> str:
     """Apply dotted-name + view replacements to GenericSetup XML content."""
-    result = content
-    for old, new in replacements:
-        result = result.replace(old, new)
+    result = _apply_replacements(content, replacements)
 
     if view_replacements:
         for old_view, new_view in view_replacements.items():
@@ -79,12 +177,45 @@ def migrate_genericsetup_content(
     return result
 
 
+@lru_cache(maxsize=32)
+def _compile_needles(needles: tuple[str, ...]) -> re.Pattern[bytes]:
+    """Compile the old names into one bytes pattern for pre-scanning files."""
+    return re.compile(_trie_pattern(needles).encode("utf-8"))
+
+
+def _could_change(filepath: Path, needles: re.Pattern[bytes]) -> bool:
+    """Return False if *filepath* is large and contains none of *needles*.
+
+    Big GenericSetup files (multi-MB ``registry.xml`` exports) usually need
+    no changes at all.  Scanning them through ``mmap`` lets the regex run
+    over the page cache directly, so such files are never copied into
+    memory or decoded.  Small files skip the check — mapping them costs
+    more than simply reading them.
+    """
+    try:
+        if filepath.stat().st_size <= MMAP_THRESHOLD:
+            return True
+        with (
+            open(filepath, "rb") as fh,
+            mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        ):
+            return needles.search(mm) is not None
+    except (OSError, ValueError):
+        # Let the regular read path report the problem
+        return True
+
+
 def migrate_file(
     filepath: Path, transformer: Callable[..., str], **kwargs: Any
 ) -> bool:
-    """Read file, apply transformer, write back if changed. Returns True if modified."""
+    """Read file, apply transformer, write back if changed. Returns True if modified.
+
+    Files are read and written as bytes with an explicit UTF-8 codec step.
+    This bypasses the text I/O layer and its newline translation, so
+    ``\r\n`` line endings survive the round trip untouched.
+    """
     try:
-        content = filepath.read_text(encoding="utf-8")
+        content = filepath.read_bytes().decode("utf-8")
     except UnicodeDecodeError:
         warnings.warn(
             f"{filepath} is not UTF-8 encoded — skipping. "
@@ -96,7 +227,7 @@ def migrate_file(
         return False
     new_content = transformer(content, **kwargs)
     if new_content != content:
-        filepath.write_text(new_content, encoding="utf-8")
+        overwrite(filepath, new_content.encode("utf-8"))
         return True
     return False
 
@@ -107,14 +238,17 @@ def migrate_zcml_files(
     dry_run: bool = False,
 ) -> list[Path]:
     """Walk directory and migrate all .zcml files."""
-    config = load_config(config_path)
-    replacements = _build_replacements(config.get("imports", []))
+    replacements, _ = _compiled_for(config_path)
+    transform = memoized(migrate_zcml_content, replacements=replacements)
+    needles = _compile_needles(tuple(old for old, _ in replacements))
 
     modified = []
-    for zcml_file in sorted(root.rglob("*.zcml")):
+    for zcml_file in iter_files(root, ".zcml"):
+        if not _could_change(zcml_file, needles):
+            continue
         if dry_run:
             try:
-                content = zcml_file.read_text(encoding="utf-8")
+                content = zcml_file.read_bytes().decode("utf-8")
             except UnicodeDecodeError:
                 warnings.warn(
                     f"{zcml_file} is not UTF-8 encoded — skipping. "
@@ -124,14 +258,16 @@ def migrate_zcml_files(
                 continue
             except OSError:
                 continue
-            new_content = migrate_zcml_content(content, replacements)
+            new_content = transform(content)
             if new_content != content:
                 modified.append(zcml_file)
         else:
-            if migrate_file(zcml_file, migrate_zcml_content, replacements=replacements):
+            if migrate_file(zcml_file, transform):
                 modified.append(zcml_file)
 
-    return modified
+    # Walk order is filesystem-dependent; sort only the (usually few)
+    # modified paths for deterministic reporting.
+    return sorted(modified)
 
 
 def migrate_genericsetup_files(
@@ -140,24 +276,32 @@ def migrate_genericsetup_files(
     dry_run: bool = False,
 ) -> list[Path]:
     """Walk directory and migrate all GenericSetup XML files."""
-    config = load_config(config_path)
-
-    # Derive dotted-name replacements from the imports section
-    replacements = _build_replacements(config.get("imports", []))
-
-    # View replacements
-    view_replacements = config.get("genericsetup", {}).get("view_replacements")
+    # Dotted-name replacements are derived from the imports section
+    replacements, view_replacements = _compiled_for(config_path)
+    transform = memoized(
+        migrate_genericsetup_content,
+        replacements=replacements,
+        view_replacements=view_replacements,
+    )
+    needles = _compile_needles(
+        tuple(old for old, _ in replacements) + tuple(view_replacements or ())
+    )
 
     modified = []
     # Look for all XML files (GenericSetup can be in various locations)
-    for xml_file in sorted(root.rglob("*.xml")):
-        # Skip ZCML files (they are handled separately)
-        if ".zcml" in xml_file.suffixes:
+    for xml_file in iter_files(root, ".xml"):
+        # Skip ZCML files (they are handled separately).  The walk already
+        # guarantees the final suffix is .xml, so only an inner .zcml
+        # suffix (e.g. overrides.zcml.xml) can occur; a substring test on
+        # the name avoids building the suffixes list for every file.
+        if ".zcml." in xml_file.name:
+            continue
+        if not _could_change(xml_file, needles):
             continue
 
         if dry_run:
             try:
-                content = xml_file.read_text(encoding="utf-8")
+                content = xml_file.read_bytes().decode("utf-8")
             except UnicodeDecodeError:
                 warnings.warn(
                     f"{xml_file} is not UTF-8 encoded — skipping. "
@@ -167,18 +311,11 @@ def migrate_genericsetup_files(
                 continue
             except OSError:
                 continue
-            new_content = migrate_genericsetup_content(
-                content, replacements, view_replacements
-            )
+            new_content = transform(content)
             if new_content != content:
                 modified.append(xml_file)
         else:
-            if migrate_file(
-                xml_file,
-                migrate_genericsetup_content,
-                replacements=replacements,
-                view_replacements=view_replacements,
-            ):
+            if migrate_file(xml_file, transform):
                 modified.append(xml_file)
 
-    return modified
+    return sorted(modified)
@@ -0,0 +1,45 @@
+"""Shared pytest fixtures."""
+
+from pathlib import Path
+from plone_codemod.zcml_migrator import load_config
+
+import pytest
+
+
+@pytest.fixture
+def fake_root(fs):
+    """An empty project directory on pyfakefs' in-memory filesystem."""
+    root = Path("/project")
+    root.mkdir()
+    return root
+
+
+@pytest.fixture(scope="session")
+def config():
+    """The bundled migration config; shared, so tests must not mutate it."""
+    return load_config()
+
+
+@pytest.fixture(scope="session")
+def big_tree(tmp_path_factory):
+    """A realistically sized add-on tree, built once per session.
+
+    Each of the 20 packages has a ``configure.zcml`` that needs migrating
+    and 25 templates in ``browser/``, of which the 13 even-numbered ones
+    need migrating.  Tests share the tree, so they must only run
+    migrations on it with ``dry_run=True``.
+    """
+    root = tmp_path_factory.mktemp("big")
+    for p in range(20):
+        browser = root / f"pkg{p}" / "browser"
+        browser.mkdir(parents=True)
+        (root / f"pkg{p}" / "configure.zcml").write_text(
+            '<adapter for="plone.app.layout.navigation.interfaces.INavigationRoot" />'
+        )
+        for t in range(25):
+            macro = "context/main_template" if t % 2 == 0 else "context/@@main_template"
+            (browser / f"view{t}.pt").write_text(
+                f'<html metal:use-macro="{macro}/macros/master">'
+                f'<p tal:content="view/title{t}" /></html>'
+            )
+    return root
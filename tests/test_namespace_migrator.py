@@ -10,7 +10,19 @@ from plone_codemod.namespace_migrator import is_only_namespace_init
 from plone_codemod.namespace_migrator import migrate_namespaces
 from plone_codemod.namespace_migrator import remove_namespace_declaration
 
-import tempfile
+import os
+
+
+PKG_RES = "__import__('pkg_resources').declare_namespace(__name__)\n"
+
+
+def make_ns_tree(root: Path, layout: dict[str, str]) -> None:
+    """Write *layout* (relative path → content) below *root*."""
+    files = {root / rel: content for rel, content in layout.items()}
+    for parent in {path.parent for path in files}:
+        os.makedirs(parent, exist_ok=True)
+    for path, content in files.items():
+        path.write_text(content)
 
 
 class TestIsNamespaceDeclaration:
@@ -79,6 +91,10 @@ class TestHasNamespaceDeclaration:
     def test_empty_init(self):
         assert not has_namespace_declaration("# empty\n")
 
+    def test_commented_out_declaration(self):
+        content = "# __import__('pkg_resources').declare_namespace(__name__)\n"
+        assert not has_namespace_declaration(content)
+
 
 class TestIsOnlyNamespaceInit:
     """Test whether a file contains only namespace declarations."""
@@ -128,6 +144,10 @@ __version__ = "1.0"
     def test_just_comments(self):
         assert not is_only_namespace_init("# just a comment\n")
 
+    def test_commented_out_declaration_only(self):
+        content = "# __import__('pkg_resources').declare_namespace(__name__)\n"
+        assert not is_only_namespace_init(content)
+
 
 class TestRemoveNamespaceDeclaration:
     """Test removal of namespace declarations from content."""
@@ -190,6 +210,14 @@ import logging
         assert "extend_path" not in result
         assert "import logging" in result
 
+    def test_no_declaration_returns_content_unchanged(self):
+        content = "import logging\n\nlogger = logging.getLogger(__name__)\n"
+        assert remove_namespace_declaration(content) is content
+
+    def test_marker_only_in_comment_returns_content_unchanged(self):
+        content = "\n# not using extend_path here\nimport logging\n\n"
+        assert remove_namespace_declaration(content) is content
+
     def test_remove_with_comments_and_blanks(self):
         content = """\
 # namespace package
@@ -203,106 +231,71 @@ __import__('pkg_resources').declare_namespace(__name__)
 class TestFindNamespaceInitFiles:
     """Test finding namespace __init__.py files in a project."""
 
-    def test_find_simple_namespace_init(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            pkg = root / "src" / "plone"
-            pkg.mkdir(parents=True)
-            init = pkg / "__init__.py"
-            init.write_text("__import__('pkg_resources').declare_namespace(__name__)\n")
-
-            results = find_namespace_init_files(root)
-            assert len(results) == 1
-            assert results[0][0] == init
-            assert results[0][1] is True  # delete entirely
-
-    def test_find_nested_namespaces(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            plone_dir = root / "src" / "plone"
-            plone_dir.mkdir(parents=True)
-            app_dir = plone_dir / "app"
-            app_dir.mkdir()
-
-            plone_init = plone_dir / "__init__.py"
-            plone_init.write_text(
-                "__import__('pkg_resources').declare_namespace(__name__)\n"
-            )
-            app_init = app_dir / "__init__.py"
-            app_init.write_text(
-                "__import__('pkg_resources').declare_namespace(__name__)\n"
-            )
-
-            # Actual package init with real code
-            mypkg = app_dir / "mypkg"
-            mypkg.mkdir()
-            mypkg_init = mypkg / "__init__.py"
-            mypkg_init.write_text("__version__ = '1.0'\n")
-
-            results = find_namespace_init_files(root)
-            assert len(results) == 2
-            paths = {r[0] for r in results}
-            assert plone_init in paths
-            assert app_init in paths
-            assert mypkg_init not in paths
-
-    def test_mixed_init_not_deleted(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            pkg = root / "src" / "plone"
-            pkg.mkdir(parents=True)
-            init = pkg / "__init__.py"
-            init.write_text(
-                "__import__('pkg_resources').declare_namespace(__name__)\n"
-                "__version__ = '1.0'\n"
-            )
-
-            results = find_namespace_init_files(root)
-            assert len(results) == 1
-            assert results[0][1] is False  # edit only, not delete
-
-    def test_skips_egg_info(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            egg = root / "plone.app.something.egg-info"
-            egg.mkdir(parents=True)
-            init = egg / "__init__.py"
-            init.write_text("__import__('pkg_resources').declare_namespace(__name__)\n")
-
-            results = find_namespace_init_files(root)
-            assert len(results) == 0
-
-    def test_skips_build_dir(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            build = root / "build" / "lib" / "plone"
-            build.mkdir(parents=True)
-            init = build / "__init__.py"
-            init.write_text("__import__('pkg_resources').declare_namespace(__name__)\n")
-
-            results = find_namespace_init_files(root)
-            assert len(results) == 0
-
-    def test_no_namespace_inits(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            pkg = root / "src" / "mypkg"
-            pkg.mkdir(parents=True)
-            init = pkg / "__init__.py"
-            init.write_text("__version__ = '1.0'\n")
-
-            results = find_namespace_init_files(root)
-            assert len(results) == 0
+    def test_find_simple_namespace_init(self, fake_root):
+        make_ns_tree(fake_root, {"src/plone/__init__.py": PKG_RES})
+
+        results = find_namespace_init_files(fake_root)
+        assert len(results) == 1
+        assert results[0][0] == fake_root / "src" / "plone" / "__init__.py"
+        assert results[0][1] is True  # delete entirely
+
+    def test_find_nested_namespaces(self, fake_root):
+        make_ns_tree(
+            fake_root,
+            {
+                "src/plone/__init__.py": PKG_RES,
+                "src/plone/app/__init__.py": PKG_RES,
+                # Actual package init with real code
+                "src/plone/app/mypkg/__init__.py": "__version__ = '1.0'\n",
+            },
+        )
+
+        results = find_namespace_init_files(fake_root)
+        assert len(results) == 2
+        paths = {r[0] for r in results}
+        assert fake_root / "src" / "plone" / "__init__.py" in paths
+        assert fake_root / "src" / "plone" / "app" / "__init__.py" in paths
+
+    def test_mixed_init_not_deleted(self, fake_root):
+        make_ns_tree(
+            fake_root, {"src/plone/__init__.py": PKG_RES + "__version__ = '1.0'\n"}
+        )
+
+        results = find_namespace_init_files(fake_root)
+        assert len(results) == 1
+        assert results[0][1] is False  # edit only, not delete
+
+    def test_skips_egg_info(self, fake_root):
+        make_ns_tree(fake_root, {"plone.app.something.egg-info/__init__.py": PKG_RES})
+
+        results = find_namespace_init_files(fake_root)
+        assert len(results) == 0
+
+    def test_skips_build_dir(self, fake_root):
+        make_ns_tree(fake_root, {"build/lib/plone/__init__.py": PKG_RES})
+
+        results = find_namespace_init_files(fake_root)
+        assert len(results) == 0
+
+    def test_skips_hidden_dirs(self, fake_root):
+        make_ns_tree(fake_root, {".tox/py312/lib/plone/__init__.py": PKG_RES})
+
+        results = find_namespace_init_files(fake_root)
+        assert len(results) == 0
+
+    def test_no_namespace_inits(self, fake_root):
+        make_ns_tree(fake_root, {"src/mypkg/__init__.py": "__version__ = '1.0'\n"})
+
+        results = find_namespace_init_files(fake_root)
+        assert len(results) == 0
 
 
 class TestCleanSetupPyNamespaces:
     """Test removal of namespace_packages from setup.py."""
 
-    def test_removes_namespace_packages(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            setup_py = root / "setup.py"
-            setup_py.write_text("""\
+    def test_removes_namespace_packages(self, tmp_path):
+        setup_py = tmp_path / "setup.py"
+        setup_py.write_text("""\
 from setuptools import setup, find_packages
 setup(
     name='plone.app.something',
@@ -310,47 +303,85 @@ setup(
     packages=find_packages('src'),
 )
 """)
-            assert clean_setup_py_namespaces(root)
-            content = setup_py.read_text()
-            assert "namespace_packages" not in content
-            assert "name='plone.app.something'" in content
-            assert "packages=find_packages('src')" in content
-
-    def test_dry_run_no_change(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            setup_py = root / "setup.py"
-            original = """\
+        assert clean_setup_py_namespaces(tmp_path)
+        content = setup_py.read_text()
+        assert "namespace_packages" not in content
+        assert "name='plone.app.something'" in content
+        assert "packages=find_packages('src')" in content
+
+    def test_dry_run_no_change(self, tmp_path):
+        setup_py = tmp_path / "setup.py"
+        original = """\
 from setuptools import setup, find_packages
 setup(
     name='plone.app.something',
     namespace_packages=['plone', 'plone.app'],
 )
 """
-            setup_py.write_text(original)
-            assert clean_setup_py_namespaces(root, dry_run=True)
-            assert setup_py.read_text() == original
+        setup_py.write_text(original)
+        assert clean_setup_py_namespaces(tmp_path, dry_run=True)
+        assert setup_py.read_text() == original
+
+    def test_no_namespace_packages(self, tmp_path):
+        setup_py = tmp_path / "setup.py"
+        setup_py.write_text("from setuptools import setup\nsetup(name='mypkg')\n")
+        assert not clean_setup_py_namespaces(tmp_path)
+
+    def test_multiline_list_with_comments(self, tmp_path):
+        setup_py = tmp_path / "setup.py"
+        setup_py.write_text("""\
+from setuptools import setup
+setup(
+    name='plone.app.something',  # the dist name
+    packages=['plone'],
+    namespace_packages=[
+        'plone',  # root
+        'plone.app',
+    ],
+    setup_requires=['setuptools'],
+)
+""")
+        assert clean_setup_py_namespaces(tmp_path)
+        assert (
+            setup_py.read_text()
+            == """\
+from setuptools import setup
+setup(
+    name='plone.app.something',  # the dist name
+    packages=['plone'],
+)
+"""
+        )
 
-    def test_no_namespace_packages(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            setup_py = root / "setup.py"
-            setup_py.write_text("from setuptools import setup\nsetup(name='mypkg')\n")
-            assert not clean_setup_py_namespaces(root)
+    def test_qualified_setup_call(self, tmp_path):
+        setup_py = tmp_path / "setup.py"
+        setup_py.write_text(
+            "import setuptools\n"
+            "setuptools.setup(name='x', namespace_packages=['plone'])\n"
+        )
+        assert clean_setup_py_namespaces(tmp_path)
+        assert setup_py.read_text() == (
+            "import setuptools\nsetuptools.setup(name='x')\n"
+        )
+
+    def test_commented_out_namespace_packages(self, tmp_path):
+        setup_py = tmp_path / "setup.py"
+        setup_py.write_text(
+            "from setuptools import setup\n"
+            "setup(\n    name='x',\n    # namespace_packages=['plone'],\n)\n"
+        )
+        assert not clean_setup_py_namespaces(tmp_path)
 
-    def test_no_setup_py(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            assert not clean_setup_py_namespaces(Path(tmpdir))
+    def test_no_setup_py(self, tmp_path):
+        assert not clean_setup_py_namespaces(tmp_path)
 
 
 class TestCleanSetupCfgNamespaces:
     """Test removal of namespace_packages from setup.cfg."""
 
-    def test_removes_namespace_packages(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            setup_cfg = root / "setup.cfg"
-            setup_cfg.write_text("""\
+    def test_removes_namespace_packages(self, tmp_path):
+        setup_cfg = tmp_path / "setup.cfg"
+        setup_cfg.write_text("""\
 [options]
 packages = find:
 namespace_packages =
@@ -358,74 +389,101 @@ namespace_packages =
     plone.app
 zip_safe = false
 """)
-            assert clean_setup_cfg_namespaces(root)
-            content = setup_cfg.read_text()
-            assert "namespace_packages" not in content
-            assert "packages = find:" in content
-            assert "zip_safe = false" in content
-
-    def test_single_line_namespace_packages(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            setup_cfg = root / "setup.cfg"
-            setup_cfg.write_text("""\
+        assert clean_setup_cfg_namespaces(tmp_path)
+        content = setup_cfg.read_text()
+        assert "namespace_packages" not in content
+        assert "packages = find:" in content
+        assert "zip_safe = false" in content
+
+    def test_single_line_namespace_packages(self, tmp_path):
+        setup_cfg = tmp_path / "setup.cfg"
+        setup_cfg.write_text("""\
 [options]
 namespace_packages = plone
 packages = find:
 """)
-            assert clean_setup_cfg_namespaces(root)
-            content = setup_cfg.read_text()
-            assert "namespace_packages" not in content
-            assert "packages = find:" in content
-
-    def test_dry_run_no_change(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            setup_cfg = root / "setup.cfg"
-            original = "[options]\nnamespace_packages = plone\n"
-            setup_cfg.write_text(original)
-            assert clean_setup_cfg_namespaces(root, dry_run=True)
-            assert setup_cfg.read_text() == original
-
-    def test_no_namespace_packages(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            setup_cfg = root / "setup.cfg"
-            setup_cfg.write_text("[options]\npackages = find:\n")
-            assert not clean_setup_cfg_namespaces(root)
+        assert clean_setup_cfg_namespaces(tmp_path)
+        content = setup_cfg.read_text()
+        assert "namespace_packages" not in content
+        assert "packages = find:" in content
+
+    def test_dry_run_no_change(self, tmp_path):
+        setup_cfg = tmp_path / "setup.cfg"
+        original = "[options]\nnamespace_packages = plone\n"
+        setup_cfg.write_text(original)
+        assert clean_setup_cfg_namespaces(tmp_path, dry_run=True)
+        assert setup_cfg.read_text() == original
+
+    def test_no_namespace_packages(self, tmp_path):
+        setup_cfg = tmp_path / "setup.cfg"
+        setup_cfg.write_text("[options]\npackages = find:\n")
+        assert not clean_setup_cfg_namespaces(tmp_path)
+
+    def test_preserves_comments(self, tmp_path):
+        setup_cfg = tmp_path / "setup.cfg"
+        setup_cfg.write_text("""\
+[options]
+# keep me
+namespace_packages = plone
+packages = find:
+""")
+        assert clean_setup_cfg_namespaces(tmp_path)
+        content = setup_cfg.read_text()
+        assert "# keep me" in content
+        assert "namespace_packages" not in content
+
+    def test_commented_out_option_untouched(self, tmp_path):
+        setup_cfg = tmp_path / "setup.cfg"
+        setup_cfg.write_text("[options]\n# namespace_packages = plone\n")
+        assert not clean_setup_cfg_namespaces(tmp_path)
+
+    def test_only_options_section_touched(self, tmp_path):
+        setup_cfg = tmp_path / "setup.cfg"
+        setup_cfg.write_text("""\
+[custom]
+namespace_packages = keep
+[options]
+namespace_packages = plone
+packages = find:
+""")
+        assert clean_setup_cfg_namespaces(tmp_path)
+        content = setup_cfg.read_text()
+        assert "namespace_packages = keep" in content
+        assert "namespace_packages = plone" not in content
+        assert "packages = find:" in content
+
+    def test_unparsable_setup_cfg_untouched(self, tmp_path):
+        setup_cfg = tmp_path / "setup.cfg"
+        original = (
+            "[options]\nnamespace_packages = plone\n[options]\nzip_safe = false\n"
+        )
+        setup_cfg.write_text(original)
+        assert not clean_setup_cfg_namespaces(tmp_path)
+        assert setup_cfg.read_text() == original
 
 
 class TestMigrateNamespaces:
     """Test the full namespace migration orchestrator."""
 
-    def test_full_migration(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            src = root / "src"
-
-            # Create namespace package structure
-            plone_dir = src / "plone"
-            plone_dir.mkdir(parents=True)
-            plone_init = plone_dir / "__init__.py"
-            plone_init.write_text(
-                "__import__('pkg_resources').declare_namespace(__name__)\n"
-            )
-
-            app_dir = plone_dir / "app"
-            app_dir.mkdir()
-            app_init = app_dir / "__init__.py"
-            app_init.write_text(
-                "__import__('pkg_resources').declare_namespace(__name__)\n"
-            )
-
-            pkg_dir = app_dir / "mypkg"
-            pkg_dir.mkdir()
-            pkg_init = pkg_dir / "__init__.py"
-            pkg_init.write_text("__version__ = '1.0'\n")
-
-            # Create setup.py
-            setup_py = root / "setup.py"
-            setup_py.write_text("""\
+    def test_full_migration(self, tmp_path):
+        src = tmp_path / "src"
+
+        # Create namespace package structure
+        make_ns_tree(
+            src,
+            {
+                "plone/__init__.py": PKG_RES,
+                "plone/app/__init__.py": PKG_RES,
+                "plone/app/mypkg/__init__.py": "__version__ = '1.0'\n",
+            },
+        )
+        plone_init = src / "plone" / "__init__.py"
+        app_init = src / "plone" / "app" / "__init__.py"
+        pkg_init = src / "plone" / "app" / "mypkg" / "__init__.py"
+
+        # Create setup.py
+        setup_py = tmp_path / "setup.py"
+        setup_py.write_text("""\
 from setuptools import setup, find_packages
 setup(
     name='plone.app.mypkg',
@@ -434,47 +492,63 @@ setup(
 )
 """)
 
-            result = migrate_namespaces(root, src)
-
-            assert len(result["deleted_files"]) == 2
-            assert not plone_init.exists()
-            assert not app_init.exists()
-            assert pkg_init.exists()
-            assert "namespace_packages" not in setup_py.read_text()
-
-    def test_dry_run(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            src = root / "src"
-            plone_dir = src / "plone"
-            plone_dir.mkdir(parents=True)
-            plone_init = plone_dir / "__init__.py"
-            plone_init.write_text(
-                "__import__('pkg_resources').declare_namespace(__name__)\n"
-            )
-
-            result = migrate_namespaces(root, src, dry_run=True)
-
-            assert len(result["deleted_files"]) == 1
-            assert plone_init.exists()  # Not actually deleted
-
-    def test_mixed_init_edited_not_deleted(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            src = root / "src"
-            plone_dir = src / "plone"
-            plone_dir.mkdir(parents=True)
-            plone_init = plone_dir / "__init__.py"
-            plone_init.write_text(
-                "__import__('pkg_resources').declare_namespace(__name__)\n"
-                "logger = __import__('logging').getLogger(__name__)\n"
-            )
-
-            result = migrate_namespaces(root, src)
-
-            assert len(result["deleted_files"]) == 0
-            assert len(result["modified_files"]) == 1
-            assert plone_init.exists()
-            content = plone_init.read_text()
-            assert "__import__('pkg_resources')" not in content
-            assert "logger" in content
+        result = migrate_namespaces(tmp_path, src)
+
+        assert len(result["deleted_files"]) == 2
+        assert not plone_init.exists()
+        assert not app_init.exists()
+        assert pkg_init.exists()
+        assert "namespace_packages" not in setup_py.read_text()
+
+    def test_dry_run(self, tmp_path):
+        src = tmp_path / "src"
+        make_ns_tree(src, {"plone/__init__.py": PKG_RES})
+        plone_init = src / "plone" / "__init__.py"
+
+        result = migrate_namespaces(tmp_path, src, dry_run=True)
+
+        assert len(result["deleted_files"]) == 1
+        assert plone_init.exists()  # Not actually deleted
+
+    def test_mixed_init_edited_not_deleted(self, tmp_path):
+        src = tmp_path / "src"
+        make_ns_tree(
+            src,
+            {
+                "plone/__init__.py": PKG_RES
+                + "logger = __import__('logging').getLogger(__name__)\n"
+            },
+        )
+        plone_init = src / "plone" / "__init__.py"
+
+        result = migrate_namespaces(tmp_path, src)
+
+        assert len(result["deleted_files"]) == 0
+        assert len(result["modified_files"]) == 1
+        assert plone_init.exists()
+        content = plone_init.read_text()
+        assert "__import__('pkg_resources')" not in content
+        assert "logger" in content
+
+    def test_trailing_declaration_truncated(self, tmp_path):
+        src = tmp_path / "src"
+        make_ns_tree(src, {"plone/__init__.py": "import logging\n\n" + PKG_RES})
+        plone_init = src / "plone" / "__init__.py"
+
+        result = migrate_namespaces(tmp_path, src)
+
+        assert result["modified_files"] == [plone_init]
+        assert plone_init.read_text() == "import logging\n"
+
+    def test_mixed_init_keeps_crlf(self, tmp_path):
+        src = tmp_path / "src"
+        os.makedirs(src / "plone")
+        plone_init = src / "plone" / "__init__.py"
+        plone_init.write_bytes(
+            b"__import__('pkg_resources').declare_namespace(__name__)\r\n"
+            b"import logging\r\n"
+        )
+
+        migrate_namespaces(tmp_path, src)
+
+        assert plone_init.read_bytes() == b"import logging\r\n"
@@ -1,222 +1,285 @@
 """Tests for the page template and Bootstrap migrators."""
 
-from pathlib import Path
-from plone_codemod.pt_migrator import load_config
 from plone_codemod.pt_migrator import migrate_bootstrap_content
 from plone_codemod.pt_migrator import migrate_bootstrap_files
 from plone_codemod.pt_migrator import migrate_pt_content
 from plone_codemod.pt_migrator import migrate_pt_files
 
+import os
 import pytest
-import tempfile
 
 
-@pytest.fixture
-def config():
-    return load_config()
-
-
-@pytest.fixture
+@pytest.fixture(scope="session")
 def pt_replacements(config):
     return config.get("pagetemplates", [])
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def bs_data_attrs(config):
     return config.get("bootstrap", {}).get("data_attributes", [])
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def bs_css_classes(config):
     return config.get("bootstrap", {}).get("css_classes", [])
 
 
-class TestPageTemplateMigration:
-    """Test safe page template fixes."""
-
-    def test_main_template_acquisition_to_view(self, pt_replacements):
-        before = '<html metal:use-macro="context/main_template/macros/master">'
-        after = migrate_pt_content(before, pt_replacements)
-        assert "context/@@main_template/macros/master" in after
-        assert "context/main_template/macros" not in after
-
-    def test_here_main_template_to_view(self, pt_replacements):
-        before = '<html metal:use-macro="here/main_template/macros/master">'
-        after = migrate_pt_content(before, pt_replacements)
-        assert "context/@@main_template/macros/master" in after
-
-    def test_prefs_main_template(self, pt_replacements):
-        before = '<html metal:use-macro="context/prefs_main_template/macros/master">'
-        after = migrate_pt_content(before, pt_replacements)
-        assert "context/@@prefs_main_template/macros/master" in after
-
-    def test_here_prefs_main_template(self, pt_replacements):
-        before = '<html metal:use-macro="here/prefs_main_template/macros/master">'
-        after = migrate_pt_content(before, pt_replacements)
-        assert "context/@@prefs_main_template/macros/master" in after
-
-    def test_here_to_context(self, pt_replacements):
-        before = 'tal:define="items here/getFolderContents"'
-        after = migrate_pt_content(before, pt_replacements)
-        assert "context/getFolderContents" in after
-        assert "here/" not in after
-
-    def test_already_uses_view_adapter(self, pt_replacements):
-        before = '<html metal:use-macro="context/@@main_template/macros/master">'
-        after = migrate_pt_content(before, pt_replacements)
-        assert after == before
-
-    def test_preserves_unrelated_content(self, pt_replacements):
-        before = '<div tal:content="view/title">Title</div>'
-        after = migrate_pt_content(before, pt_replacements)
-        assert after == before
-
-    def test_multiple_replacements_in_one_file(self, pt_replacements):
-        before = """<html metal:use-macro="context/main_template/macros/master">
+OLD_PT = '<html metal:use-macro="context/main_template/macros/master">'
+
+
+@pytest.fixture(scope="session")
+def sample_pt_tree(tmp_path_factory):
+    """A tree with one unmigrated template, shared by read-only tests.
+
+    Tests that migrate files for real must work on their own tmp_path.
+    """
+    root = tmp_path_factory.mktemp("pt")
+    (root / "myview.pt").write_text(OLD_PT)
+    return root
+
+
+# (template before, substrings the result must contain, substrings it must not)
+PT_CASES = [
+    pytest.param(
+        '<html metal:use-macro="context/main_template/macros/master">',
+        ["context/@@main_template/macros/master"],
+        ["context/main_template/macros"],
+        id="main_template_acquisition_to_view",
+    ),
+    pytest.param(
+        '<html metal:use-macro="here/main_template/macros/master">',
+        ["context/@@main_template/macros/master"],
+        [],
+        id="here_main_template_to_view",
+    ),
+    pytest.param(
+        '<html metal:use-macro="context/prefs_main_template/macros/master">',
+        ["context/@@prefs_main_template/macros/master"],
+        [],
+        id="prefs_main_template",
+    ),
+    pytest.param(
+        '<html metal:use-macro="here/prefs_main_template/macros/master">',
+        ["context/@@prefs_main_template/macros/master"],
+        [],
+        id="here_prefs_main_template",
+    ),
+    pytest.param(
+        'tal:define="items here/getFolderContents"',
+        ["context/getFolderContents"],
+        ["here/"],
+        id="here_to_context",
+    ),
+    pytest.param(
+        """<html metal:use-macro="context/main_template/macros/master">
 <body>
   <div tal:define="x here/title">
     <span tal:content="here/description" />
   </div>
 </body>
-</html>"""
-        after = migrate_pt_content(before, pt_replacements)
-        assert "context/@@main_template" in after
-        assert "context/title" in after
-        assert "context/description" in after
-        assert "here/" not in after
-
-
-class TestBootstrapMigration:
-    """Test Bootstrap 3→5 migration."""
+</html>""",
+        ["context/@@main_template", "context/title", "context/description"],
+        ["here/"],
+        id="multiple_replacements_in_one_file",
+    ),
+]
+
+# (markup before, substrings the result must contain, substrings it must not)
+BOOTSTRAP_CASES = [
+    pytest.param(
+        '<button data-toggle="modal" data-target="#myModal">',
+        ['data-bs-toggle="modal"', 'data-bs-target="#myModal"'],
+        ["data-toggle=", "data-target="],
+        id="data_toggle",
+    ),
+    pytest.param(
+        '<button data-dismiss="modal">',
+        ['data-bs-dismiss="modal"'],
+        [],
+        id="data_dismiss",
+    ),
+    pytest.param(
+        '<div class="pull-right">',
+        ["float-end"],
+        ["pull-right"],
+        id="pull_right_to_float_end",
+    ),
+    pytest.param(
+        '<div class="pull-left">',
+        ["float-start"],
+        [],
+        id="pull_left_to_float_start",
+    ),
+    pytest.param(
+        '<button class="btn btn-default">',
+        ["btn-secondary"],
+        ["btn-default"],
+        id="btn_default_to_secondary",
+    ),
+    pytest.param(
+        '<img class="img-responsive">',
+        ["img-fluid"],
+        [],
+        id="img_responsive_to_fluid",
+    ),
+    pytest.param(
+        '<div class="panel panel-default"><div class="panel-heading">H</div>'
+        '<div class="panel-body">B</div></div>',
+        ["card", "card-header", "card-body"],
+        ["panel-default", "panel-heading", "panel-body"],
+        id="panel_to_card",
+    ),
+    pytest.param(
+        '<div class="hidden-xs">',
+        ["d-none d-sm-block"],
+        [],
+        id="hidden_xs",
+    ),
+    pytest.param(
+        '<a class="plone-btn plone-btn-primary">',
+        ["btn ", "btn-primary"],
+        ["plone-btn"],
+        id="plone_btn_classes",
+    ),
+    pytest.param(
+        '<div data-ride="carousel">',
+        ['data-bs-ride="carousel"'],
+        [],
+        id="data_ride_carousel",
+    ),
+    pytest.param(
+        '<span class="label label-info">New</span>',
+        ['class="badge rounded-pill bg-info"'],
+        ["label"],
+        id="label_to_badge_chained",
+    ),
+]
+
+
+def assert_substrings(
+    after: str, must_have: list[str], must_not_have: list[str]
+) -> None:
+    """Assert that *after* contains every *must_have* and no *must_not_have*."""
+    __tracebackhide__ = True
+    for text in must_have:
+        assert text in after
+    for text in must_not_have:
+        assert text not in after
 
-    def test_data_toggle(self, bs_data_attrs, bs_css_classes):
-        before = '<button data-toggle="modal" data-target="#myModal">'
-        after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert 'data-bs-toggle="modal"' in after
-        assert 'data-bs-target="#myModal"' in after
-        assert "data-toggle=" not in after
-        assert "data-target=" not in after
 
-    def test_data_dismiss(self, bs_data_attrs, bs_css_classes):
-        before = '<button data-dismiss="modal">'
-        after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert 'data-bs-dismiss="modal"' in after
-
-    def test_pull_right_to_float_end(self, bs_data_attrs, bs_css_classes):
-        before = '<div class="pull-right">'
-        after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert "float-end" in after
-        assert "pull-right" not in after
-
-    def test_pull_left_to_float_start(self, bs_data_attrs, bs_css_classes):
-        before = '<div class="pull-left">'
-        after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert "float-start" in after
+class TestPageTemplateMigration:
+    """Test safe page template fixes."""
 
-    def test_btn_default_to_secondary(self, bs_data_attrs, bs_css_classes):
-        before = '<button class="btn btn-default">'
-        after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert "btn-secondary" in after
-        assert "btn-default" not in after
+    @pytest.mark.parametrize("before,must_have,must_not_have", PT_CASES)
+    def test_pt_rule(self, pt_replacements, before, must_have, must_not_have):
+        after = migrate_pt_content(before, pt_replacements)
+        assert_substrings(after, must_have, must_not_have)
+
+    @pytest.mark.parametrize(
+        "before",
+        [
+            '<html metal:use-macro="context/@@main_template/macros/master">',
+            '<div tal:content="view/title">Title</div>',
+            # Bootstrap markup is only migrated by the --bootstrap pass
+            '<button data-toggle="modal">',
+        ],
+        ids=[
+            "already_uses_view_adapter",
+            "preserves_unrelated_content",
+            "leaves_bootstrap_alone",
+        ],
+    )
+    def test_unchanged(self, pt_replacements, before):
+        assert migrate_pt_content(before, pt_replacements) == before
 
-    def test_img_responsive_to_fluid(self, bs_data_attrs, bs_css_classes):
-        before = '<img class="img-responsive">'
-        after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert "img-fluid" in after
 
-    def test_panel_to_card(self, bs_data_attrs, bs_css_classes):
-        before = '<div class="panel panel-default"><div class="panel-heading">H</div><div class="panel-body">B</div></div>'
-        after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert "card" in after
-        assert "card-header" in after
-        assert "card-body" in after
-        assert "panel-default" not in after
-        assert "panel-heading" not in after
-        assert "panel-body" not in after
-
-    def test_hidden_xs(self, bs_data_attrs, bs_css_classes):
-        before = '<div class="hidden-xs">'
-        after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert "d-none d-sm-block" in after
+class TestBootstrapMigration:
+    """Test Bootstrap 3→5 migration."""
 
-    def test_plone_btn_classes(self, bs_data_attrs, bs_css_classes):
-        before = '<a class="plone-btn plone-btn-primary">'
+    @pytest.mark.parametrize("before,must_have,must_not_have", BOOTSTRAP_CASES)
+    def test_bootstrap_rule(
+        self, bs_data_attrs, bs_css_classes, before, must_have, must_not_have
+    ):
         after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert "btn " in after
-        assert "btn-primary" in after
-        assert "plone-btn" not in after
+        assert_substrings(after, must_have, must_not_have)
 
     def test_no_change_when_nothing_matches(self, bs_data_attrs, bs_css_classes):
         before = '<div class="my-custom-class">Content</div>'
         after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
         assert after == before
 
-    def test_data_ride_carousel(self, bs_data_attrs, bs_css_classes):
-        before = '<div data-ride="carousel">'
-        after = migrate_bootstrap_content(before, bs_data_attrs, bs_css_classes)
-        assert 'data-bs-ride="carousel"' in after
+    def test_rules_apply_in_order(self):
+        # Runs sharing a prefix are skipped together, but rule order and
+        # chaining stay exactly as with plain sequential replacement
+        data_attributes = [{"old": "data-a=", "new": "data-b="}]
+        css_classes = [
+            {"old": "btn-aa", "new": "btn-bb"},
+            {"old": "btn-bb", "new": "btn-cc"},
+            {"old": "data-b=", "new": "data-c="},
+        ]
+        after = migrate_bootstrap_content(
+            '<a data-a="1" class="btn-aa">', data_attributes, css_classes
+        )
+        assert after == '<a data-c="1" class="btn-cc">'
 
 
 class TestFileOperations:
     """Test file-level migration operations."""
 
-    def test_migrate_pt_files(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            pt_file = root / "myview.pt"
-            pt_file.write_text(
-                '<html metal:use-macro="context/main_template/macros/master">'
-            )
-
-            modified = migrate_pt_files(root)
-            assert len(modified) == 1
-            content = pt_file.read_text()
-            assert "context/@@main_template" in content
-
-    def test_migrate_pt_dry_run(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            original = '<html metal:use-macro="context/main_template/macros/master">'
-            pt_file = root / "myview.pt"
-            pt_file.write_text(original)
-
-            modified = migrate_pt_files(root, dry_run=True)
-            assert len(modified) == 1
-            assert pt_file.read_text() == original  # NOT changed
-
-    def test_migrate_bootstrap_only_with_flag(self):
-        """Bootstrap migration only runs when explicitly called."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            pt_file = root / "myview.pt"
-            pt_file.write_text('<button data-toggle="modal">')
-
-            # PT migration should NOT touch data-toggle
-            modified_pt = migrate_pt_files(root)
-            assert len(modified_pt) == 0
-
-            # Bootstrap migration SHOULD fix it
-            modified_bs = migrate_bootstrap_files(root)
-            assert len(modified_bs) == 1
-            assert "data-bs-toggle" in pt_file.read_text()
-
-    def test_migrate_bootstrap_html_files(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            html_file = root / "index.html"
-            html_file.write_text('<div class="pull-right">Content</div>')
-
-            modified = migrate_bootstrap_files(root)
-            assert len(modified) == 1
-            assert "float-end" in html_file.read_text()
-
-    def test_no_changes_needed(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            pt_file = root / "modern.pt"
-            pt_file.write_text(
-                '<html metal:use-macro="context/@@main_template/macros/master">'
-            )
-
-            modified = migrate_pt_files(root)
-            assert len(modified) == 0
+    def test_migrate_pt_files(self, tmp_path):
+        pt_file = tmp_path / "myview.pt"
+        pt_file.write_text(OLD_PT)
+
+        modified = migrate_pt_files(tmp_path)
+        assert len(modified) == 1
+        content = pt_file.read_bytes()
+        assert b"context/@@main_template" in content
+
+    def test_migrate_pt_dry_run(self, sample_pt_tree):
+        modified = migrate_pt_files(sample_pt_tree, dry_run=True)
+        assert modified == [sample_pt_tree / "myview.pt"]
+        assert modified[0].read_text() == OLD_PT  # NOT changed
+
+    def test_migrate_bootstrap_files(self, tmp_path):
+        pt_file = tmp_path / "myview.pt"
+        pt_file.write_text('<button data-toggle="modal">')
+        html_file = tmp_path / "index.html"
+        html_file.write_text('<div class="pull-right">Content</div>')
+
+        modified = migrate_bootstrap_files(tmp_path)
+        assert sorted(modified) == [html_file, pt_file]
+        assert b"data-bs-toggle" in pt_file.read_bytes()
+        assert b"float-end" in html_file.read_bytes()
+
+    @pytest.mark.parametrize("migrate", [migrate_pt_files, migrate_bootstrap_files])
+    def test_unchanged_file_not_rewritten(self, tmp_path, migrate):
+        pt_file = tmp_path / "myview.pt"
+        pt_file.write_text('<div class="my-custom-class">Content</div>')
+        os.utime(pt_file, ns=(0, 0))
+
+        assert migrate(tmp_path) == []
+        assert pt_file.stat().st_mtime_ns == 0
+
+    @pytest.mark.parametrize("skipped", [".venv", ".git", "node_modules"])
+    def test_skipped_directories_not_descended(self, tmp_path, skipped):
+        pt_file = tmp_path / skipped / "browser" / "myview.pt"
+        pt_file.parent.mkdir(parents=True)
+        original = OLD_PT + '<button data-toggle="modal">'
+        pt_file.write_text(original)
+
+        assert migrate_pt_files(tmp_path) == []
+        assert migrate_bootstrap_files(tmp_path) == []
+        assert pt_file.read_text() == original
+
+
+class TestBigTree:
+    """Dry runs over the shared, session-scoped ``big_tree``."""
+
+    @pytest.mark.parametrize(
+        "subdir,expected",
+        [("", 20 * 13), ("pkg0", 13), ("pkg0/browser", 13)],
+    )
+    def test_migrate_pt_files(self, big_tree, subdir, expected):
+        modified = migrate_pt_files(big_tree / subdir, dry_run=True)
+        assert len(modified) == expected
+        assert modified == sorted(modified)
@@ -1,37 +1,48 @@
 """Tests for the ZCML and GenericSetup XML migrator."""
 
-from pathlib import Path
 from plone_codemod.zcml_migrator import _build_replacements
-from plone_codemod.zcml_migrator import load_config
+from plone_codemod.zcml_migrator import _compiled_for
+from plone_codemod.zcml_migrator import CONFIG_PATH
 from plone_codemod.zcml_migrator import migrate_genericsetup_content
 from plone_codemod.zcml_migrator import migrate_genericsetup_files
 from plone_codemod.zcml_migrator import migrate_zcml_content
 from plone_codemod.zcml_migrator import migrate_zcml_files
+from plone_codemod.zcml_migrator import MMAP_THRESHOLD
 
+import os
 import pytest
-import tempfile
+import yaml
 
 
-@pytest.fixture
-def config():
-    return load_config()
-
-
-@pytest.fixture
+@pytest.fixture(scope="session")
 def zcml_replacements(config):
     return _build_replacements(config.get("imports", []))
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def gs_replacements(config):
     return _build_replacements(config.get("imports", []))
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def view_replacements(config):
     return config.get("genericsetup", {}).get("view_replacements")
 
 
+OLD_ZCML = '<adapter for="plone.app.layout.navigation.interfaces.INavigationRoot" />'
+
+
+@pytest.fixture(scope="session")
+def sample_zcml_tree(tmp_path_factory):
+    """A tree with one unmigrated ZCML file, shared by read-only tests.
+
+    Tests that migrate files for real must work on their own tmp_path.
+    """
+    root = tmp_path_factory.mktemp("zcml")
+    (root / "configure.zcml").write_text(OLD_ZCML)
+    return root
+
+
 class TestZCMLMigration:
     """Test ZCML dotted name replacements."""
 
@@ -77,6 +88,36 @@ class TestZCMLMigration:
         after = migrate_zcml_content(before, zcml_replacements)
         assert after == before
 
+    def test_longest_match_wins(self):
+        replacements = _build_replacements(
+            [
+                {"old": "a.b", "new": "x.y"},
+                {"old": "a.b.IFoo", "new": "z.IFoo"},
+            ]
+        )
+        after = migrate_zcml_content('for="a.b.IFoo" class="a.b.Bar"', replacements)
+        assert after == 'for="z.IFoo" class="x.y.Bar"'
+        # Plain pair sequences are compiled on the fly to the same result
+        plain = migrate_zcml_content('for="a.b.IFoo"', list(replacements))
+        assert plain == 'for="z.IFoo"'
+
+    def test_shared_prefix_falls_back_to_shorter_name(self):
+        replacements = _build_replacements(
+            [
+                {"old": "a.b.IFoo", "new": "x.IFoo"},
+                {"old": "a.b.IFooBar", "new": "y.IFooBar"},
+            ]
+        )
+        after = migrate_zcml_content("a.b.IFooBaz a.b.IFooBar a.b.IFo", replacements)
+        assert after == "x.IFooBaz y.IFooBar a.b.IFo"
+
+    def test_compiled_bundle_cached_per_config(self):
+        assert _compiled_for(CONFIG_PATH) is _compiled_for(CONFIG_PATH)
+
+    def test_config_loader_matches_pure_python_parse(self, config):
+        with open(CONFIG_PATH) as fh:
+            assert config == yaml.load(fh, Loader=yaml.SafeLoader)
+
     def test_preserves_xml_structure(self, zcml_replacements):
         before = """<configure xmlns="http://namespaces.zope.org/zope"
            xmlns:browser="http://namespaces.zope.org/browser">
@@ -138,57 +179,136 @@ class TestGenericSetupMigration:
 class TestFileOperations:
     """Test file-level migration operations."""
 
-    def test_migrate_zcml_files_in_directory(self, config):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            zcml_file = root / "configure.zcml"
-            zcml_file.write_text(
-                '<adapter for="plone.app.layout.navigation.interfaces.INavigationRoot" />'
-            )
-
-            modified = migrate_zcml_files(root)
-            assert len(modified) == 1
-            content = zcml_file.read_text()
-            assert "plone.base.interfaces.siteroot.INavigationRoot" in content
-
-    def test_migrate_zcml_dry_run(self, config):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            original = '<adapter for="plone.app.layout.navigation.interfaces.INavigationRoot" />'
-            zcml_file = root / "configure.zcml"
-            zcml_file.write_text(original)
-
-            modified = migrate_zcml_files(root, dry_run=True)
-            assert len(modified) == 1
-            # File should NOT be changed in dry run
-            assert zcml_file.read_text() == original
-
-    def test_migrate_genericsetup_files_in_profiles(self, config):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            profiles = root / "profiles" / "default"
-            profiles.mkdir(parents=True)
-            xml_file = profiles / "registry.xml"
-            xml_file.write_text(
-                '<records interface="Products.CMFPlone.interfaces.controlpanel.IEditingSchema" />'
-            )
-
-            modified = migrate_genericsetup_files(root)
-            assert len(modified) == 1
-            content = xml_file.read_text()
-            assert "plone.base.interfaces.controlpanel.IEditingSchema" in content
-
-    def test_migrate_genericsetup_files_in_other_locations(self, config):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            root = Path(tmpdir)
-            profiles = root / "other"
-            profiles.mkdir(parents=True)
-            xml_file = profiles / "resources.xml"
-            xml_file.write_text(
-                '<records interface="Products.CMFPlone.interfaces.IBundleRegistry" />'
-            )
-
-            modified = migrate_genericsetup_files(root)
-            assert len(modified) == 1
-            content = xml_file.read_text()
-            assert "plone.base.interfaces.resources.IBundleRegistry" in content
+    def test_migrate_zcml_files_in_directory(self, tmp_path):
+        zcml_file = tmp_path / "configure.zcml"
+        zcml_file.write_text(OLD_ZCML)
+
+        modified = migrate_zcml_files(tmp_path)
+        assert len(modified) == 1
+        content = zcml_file.read_bytes()
+        assert b"plone.base.interfaces.siteroot.INavigationRoot" in content
+
+    def test_identical_zcml_files_all_migrated(self, tmp_path):
+        files = []
+        for sub in ("a", "b", "c"):
+            (tmp_path / sub).mkdir()
+            zcml_file = tmp_path / sub / "configure.zcml"
+            zcml_file.write_text(OLD_ZCML)
+            files.append(zcml_file)
+
+        modified = migrate_zcml_files(tmp_path)
+        assert sorted(modified) == files
+        for zcml_file in files:
+            assert b"plone.base.interfaces.siteroot" in zcml_file.read_bytes()
+
+    def test_symlinked_directory_not_followed(self, tmp_path):
+        real = tmp_path / "real"
+        real.mkdir()
+        zcml_file = real / "configure.zcml"
+        zcml_file.write_text(OLD_ZCML)
+        (tmp_path / "link").symlink_to(real, target_is_directory=True)
+
+        assert migrate_zcml_files(tmp_path) == [zcml_file]
+
+    def test_migrate_zcml_preserves_crlf(self, tmp_path):
+        zcml_file = tmp_path / "configure.zcml"
+        zcml_file.write_bytes(
+            b"<configure>\r\n"
+            b'<adapter for="plone.app.layout.navigation.interfaces.INavigationRoot" />\r\n'
+            b"</configure>\r\n"
+        )
+
+        migrate_zcml_files(tmp_path)
+        content = zcml_file.read_bytes()
+        assert b"plone.base.interfaces.siteroot.INavigationRoot" in content
+        assert content.count(b"\r\n") == 3
+
+    def test_migrate_zcml_dry_run(self, sample_zcml_tree):
+        modified = migrate_zcml_files(sample_zcml_tree, dry_run=True)
+        assert modified == [sample_zcml_tree / "configure.zcml"]
+        # File should NOT be changed in dry run
+        assert modified[0].read_text() == OLD_ZCML
+
+    def test_migrate_genericsetup_files_in_profiles(self, tmp_path):
+        profiles = tmp_path / "profiles" / "default"
+        profiles.mkdir(parents=True)
+        xml_file = profiles / "registry.xml"
+        xml_file.write_text(
+            '<records interface="Products.CMFPlone.interfaces.controlpanel.IEditingSchema" />'
+        )
+
+        modified = migrate_genericsetup_files(tmp_path)
+        assert len(modified) == 1
+        content = xml_file.read_bytes()
+        assert b"plone.base.interfaces.controlpanel.IEditingSchema" in content
+
+    def test_migrate_genericsetup_files_in_other_locations(self, tmp_path):
+        profiles = tmp_path / "other"
+        profiles.mkdir(parents=True)
+        xml_file = profiles / "resources.xml"
+        xml_file.write_text(
+            '<records interface="Products.CMFPlone.interfaces.IBundleRegistry" />'
+        )
+
+        modified = migrate_genericsetup_files(tmp_path)
+        assert len(modified) == 1
+        content = xml_file.read_bytes()
+        assert b"plone.base.interfaces.resources.IBundleRegistry" in content
+
+    @pytest.mark.parametrize("skipped", [".venv", ".git", "node_modules"])
+    def test_skipped_directories_not_descended(self, tmp_path, skipped):
+        xml_file = tmp_path / skipped / "profiles" / "default" / "registry.xml"
+        xml_file.parent.mkdir(parents=True)
+        xml_file.write_text(
+            '<records interface="Products.CMFPlone.interfaces.IBundleRegistry" />'
+        )
+
+        assert migrate_genericsetup_files(tmp_path) == []
+        assert b"Products.CMFPlone" in xml_file.read_bytes()
+
+    def test_large_xml_without_matches_untouched(self, tmp_path):
+        xml_file = tmp_path / "registry.xml"
+        record = '<record name="my.custom.setting"><value>1</value></record>\n'
+        xml_file.write_text(record * (MMAP_THRESHOLD // len(record) + 1))
+
+        assert migrate_genericsetup_files(tmp_path) == []
+
+    def test_large_xml_with_match_migrated(self, tmp_path):
+        xml_file = tmp_path / "registry.xml"
+        record = '<record name="my.custom.setting"><value>1</value></record>\n'
+        xml_file.write_text(
+            record * (MMAP_THRESHOLD // len(record) + 1)
+            + '<records interface="Products.CMFPlone.interfaces.IBundleRegistry" />\n'
+        )
+
+        modified = migrate_genericsetup_files(tmp_path)
+        assert modified == [xml_file]
+        assert b"plone.base.interfaces.resources.IBundleRegistry" in (
+            xml_file.read_bytes()
+        )
+
+    @pytest.mark.parametrize(
+        "migrate,name",
+        [
+            (migrate_zcml_files, "configure.zcml"),
+            (migrate_genericsetup_files, "registry.xml"),
+        ],
+    )
+    def test_unchanged_file_not_rewritten(self, tmp_path, migrate, name):
+        unchanged = tmp_path / name
+        unchanged.write_text('<configure xmlns="http://namespaces.zope.org/zope" />')
+        os.utime(unchanged, ns=(0, 0))
+
+        assert migrate(tmp_path) == []
+        assert unchanged.stat().st_mtime_ns == 0
+
+
+class TestBigTree:
+    """Dry runs over the shared, session-scoped ``big_tree``."""
+
+    @pytest.mark.parametrize(
+        "subdir,expected", [("", 20), ("pkg0", 1), ("pkg0/browser", 0)]
+    )
+    def test_migrate_zcml_files(self, big_tree, subdir, expected):
+        modified = migrate_zcml_files(big_tree / subdir, dry_run=True)
+        assert len(modified) == expected